@@ -0,0 +1,66 @@
+import statistics
+
+
+def percentile(samples, pct):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def summarize(latencies, query_counts, errors):
+    """
+    Reduce raw per-request samples (seconds) into the figures stored in results files.
+    Requests run one at a time, so no throughput is derived from them; see
+    `manage.py bench_login` for load. Latency figures are None when nothing
+    was measured.
+    """
+    if not latencies:
+        return {
+            'requests': 0, 'errors': errors, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None,
+            'mean_ms': None, 'queries_per_request': None,
+        }
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'queries_per_request': round(statistics.fmean(query_counts), 2),
+    }
+
+
+def compare(current, baseline, tolerance):
+    """
+    Return a human readable line for every route that got slower than the
+    baseline p95 by more than `tolerance`, or that issues more queries.
+    """
+    regressions = []
+    for route, base in baseline.items():
+        result = current.get(route)
+        if result is None or result['p95_ms'] is None or base.get('p95_ms') is None:
+            continue
+        limit = base['p95_ms'] * (1 + tolerance)
+        if result['p95_ms'] > limit:
+            regressions.append(
+                f"{route}: p95 {result['p95_ms']:.2f}ms > {base['p95_ms']:.2f}ms (+{tolerance:.0%} allowed)"
+            )
+        if result['queries_per_request'] > base['queries_per_request']:
+            regressions.append(
+                f"{route}: {result['queries_per_request']} queries/request > {base['queries_per_request']}"
+            )
+    return regressions
+
+
+def format_table(results):
+    header = f"{'route':<20}{'reqs':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'queries':>9}"
+    lines = [header, '-' * len(header)]
+    for route, result in results.items():
+        if not result['requests']:
+            lines.append(f"{route:<20}{0:>7}  no requests measured")
+            continue
+        lines.append(
+            f"{route:<20}{result['requests']:>7}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            f"{result['p99_ms']:>10.2f}{result['mean_ms']:>10.2f}{result['queries_per_request']:>9.2f}"
+        )
+    return '\n'.join(lines)
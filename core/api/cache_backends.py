@@ -0,0 +1,47 @@
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from .metrics import registry
+
+_missing = object()
+
+
+class CacheMetricsMixin:
+    """
+    Counts hits and misses of get()/get_many() in the metrics registry.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        if value is _missing:
+            registry.inc('cache_requests_total', (('result', 'miss'),))
+            return default
+        registry.inc('cache_requests_total', (('result', 'hit'),))
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self._get_many(keys, version)
+        if found:
+            registry.inc('cache_requests_total', (('result', 'hit'),), len(found))
+        if len(keys) > len(found):
+            registry.inc('cache_requests_total', (('result', 'miss'),), len(keys) - len(found))
+        return found
+
+    def _get_many(self, keys, version):
+        return super().get_many(keys, version)
+
+
+class InstrumentedLocMemCache(CacheMetricsMixin, LocMemCache):
+    def _get_many(self, keys, version):
+        # BaseCache.get_many() goes through self.get(), which would count every key twice.
+        found = {}
+        for key in keys:
+            value = LocMemCache.get(self, key, _missing, version)
+            if value is not _missing:
+                found[key] = value
+        return found
+
+
+class InstrumentedRedisCache(CacheMetricsMixin, RedisCache):
+    pass
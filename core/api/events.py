@@ -0,0 +1,173 @@
+"""
+Publish/subscribe for the real-time feed stream.
+
+Events are published on per-author channels (`posts:<user id>`) and every
+stream subscribes to the channels of the users it follows, so a new post
+costs one publish no matter how many followers are connected. The broker
+class is chosen with settings.EVENTS['BROKER'].
+
+Events stay small: new posts are published as {'type': 'post', 'post_id': id}
+and the stream loads the row through api.post_cache, since a NOTIFY payload
+is limited to 8000 bytes.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from functools import lru_cache
+
+import orjson
+import psycopg2
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def author_channel(user_id):
+    return f'posts:{user_id}'
+
+
+class Subscription:
+    """
+    A bounded queue of events for one connected client. A client that falls
+    QUEUE_SIZE events behind is marked as overflowed instead of buffering
+    without limit; the stream then tells it to reload.
+    """
+
+    def __init__(self, channels, maxsize):
+        self.channels = set(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Wake the consumer so it notices right away.
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class InProcessBroker:
+    """
+    Delivers events to the subscribers of the current process only. Enough
+    for a single ASGI worker; publishing is safe from any thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels = {}
+
+    def subscribe(self, channels):
+        subscription = Subscription(channels, settings.EVENTS['QUEUE_SIZE'])
+        with self.lock:
+            for channel in subscription.channels:
+                self.channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.channels[channel]
+
+    def publish(self, channel, event):
+        self.dispatch(channel, event)
+
+    def dispatch(self, channel, event):
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Shares events between processes through PostgreSQL LISTEN/NOTIFY, so no
+    extra service is needed when running several ASGI workers. Each process
+    keeps one listening connection in a background thread, started by the
+    first subscription.
+    """
+    pg_channel = 'api_events'
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+        self.listening = threading.Event()
+        self.stopping = threading.Event()
+
+    def subscribe(self, channels):
+        self.start()
+        return super().subscribe(channels)
+
+    def publish(self, channel, event):
+        payload = orjson.dumps({'channel': channel, 'event': event}).decode()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.pg_channel, payload])
+
+    def start(self):
+        with self.lock:
+            if self.listener is not None and self.listener.is_alive():
+                return
+            self.stopping.clear()
+            self.listener = threading.Thread(target=self.listen, daemon=True)
+            self.listener.start()
+
+    def stop(self):
+        self.stopping.set()
+        if self.listener is not None:
+            self.listener.join()
+
+    def listen(self):
+        params = connection.get_connection_params()
+        while not self.stopping.is_set():
+            pg = None
+            try:
+                pg = psycopg2.connect(**params)
+                pg.autocommit = True
+                with pg.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.pg_channel}")
+                self.listening.set()
+                while not self.stopping.is_set():
+                    if select.select([pg], [], [], 1) == ([], [], []):
+                        continue
+                    pg.poll()
+                    while pg.notifies:
+                        notify = pg.notifies.pop(0)
+                        message = json.loads(notify.payload)
+                        self.dispatch(message['channel'], message['event'])
+            except Exception:
+                logger.exception("Event listener connection failed, reconnecting")
+                time.sleep(1)
+            finally:
+                self.listening.clear()
+                if pg is not None:
+                    pg.close()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.EVENTS['BROKER'])()
+
+
+def publish(channel, event):
+    """
+    Publish `event` once the current transaction commits, so subscribers
+    never see rows that could still be rolled back. Broker errors are logged
+    rather than raised, the write they follow is already committed.
+    """
+    transaction.on_commit(lambda: get_broker().publish(channel, event), robust=True)
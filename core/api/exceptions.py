@@ -0,0 +1,22 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from .hashers import HashingUnavailable
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many logins in progress, try again shortly."
+    default_code = 'hashing_unavailable'
+    wait = 1
+
+
+def exception_handler(exc, context):
+    """
+    DRF's exception handler, also answering a full password hashing pool
+    with 503 and Retry-After.
+    """
+    if isinstance(exc, HashingUnavailable):
+        exc = HashingBusy()
+    return drf_exception_handler(exc, context)
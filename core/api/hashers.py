@@ -0,0 +1,89 @@
+import base64
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class HashingUnavailable(Exception):
+    """
+    Raised when the pool is full. Hashing also runs outside the API (admin,
+    createsuperuser), so this is not an APIException; API views answer it
+    with 503 through api.exceptions.exception_handler.
+    """
+
+
+class HashingPool:
+    """
+    A process pool for password hashing with a cap on the number of hashes
+    queued or running in this process. Requests over the cap are rejected
+    at once instead of waiting behind a login storm, and hashing never uses
+    more than PROCESSES cores, leaving the rest to cheap endpoints.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+        self.pending = 0
+
+    def get_executor(self):
+        # Executors do not survive fork, a forked worker starts its own.
+        if self.executor is None or self.pid != os.getpid():
+            self.executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING['PROCESSES'],
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            self.pid = os.getpid()
+            self.pending = 0
+        return self.executor
+
+    def run(self, func, *args):
+        with self.lock:
+            if self.pending >= settings.PASSWORD_HASHING['MAX_PENDING']:
+                raise HashingUnavailable()
+            executor = self.get_executor()
+            self.pending += 1
+        try:
+            return executor.submit(func, *args).result()
+        except BrokenProcessPool:
+            with self.lock:
+                if self.executor is executor:
+                    self.executor = None
+            raise
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+
+pool = HashingPool()
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2-SHA256 hasher computing the key in `pool`, so hashes
+    stay compatible in both directions. The iteration count comes from
+    PASSWORD_HASHING['ITERATIONS']; after it changes, Django rehashes each
+    password the next time its owner logs in.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING['ITERATIONS'] or PBKDF2PasswordHasher.iterations
+
+    def encode(self, password, salt, iterations=None):
+        self._check_encode_args(password, salt)
+        iterations = iterations or self.iterations
+        if settings.PASSWORD_HASHING['PROCESSES']:
+            hash = pool.run(
+                hashlib.pbkdf2_hmac, self.digest().name, password.encode(), salt.encode(), iterations,
+            )
+        else:
+            hash = hashlib.pbkdf2_hmac(self.digest().name, password.encode(), salt.encode(), iterations)
+        hash = base64.b64encode(hash).decode('ascii').strip()
+        return '%s$%d$%s$%s' % (self.algorithm, iterations, salt, hash)
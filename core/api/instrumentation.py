@@ -0,0 +1,71 @@
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+class QueryCounter:
+    """
+    Counts SQL statements issued on a connection through execute_wrapper,
+    without turning on Django's debug cursor.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+@contextmanager
+def wrap_connections(wrapper, using=None):
+    """
+    Install `wrapper` with execute_wrapper on the `using` connection, or on
+    every configured alias so queries sent to read replicas are seen too.
+    """
+    with ExitStack() as stack:
+        for conn in ([using] if using is not None else connections.all()):
+            stack.enter_context(conn.execute_wrapper(wrapper))
+        yield wrapper
+
+
+@contextmanager
+def count_queries(using=None):
+    with wrap_connections(QueryCounter(), using) as counter:
+        yield counter
+
+
+class SQLRecorder:
+    """
+    execute_wrapper that keeps the time spent per distinct SQL statement.
+    """
+
+    def __init__(self):
+        self.statements = defaultdict(lambda: {'count': 0, 'duration': 0.0})
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            statement = self.statements[sql]
+            statement['count'] += 1
+            statement['duration'] += time.perf_counter() - started
+
+    def summary(self, limit=10):
+        top = sorted(self.statements.items(), key=lambda item: item[1]['duration'], reverse=True)
+        return {
+            'queries': sum(stat['count'] for stat in self.statements.values()),
+            'duration_ms': round(sum(stat['duration'] for stat in self.statements.values()) * 1000, 3),
+            'top': [
+                {'sql': sql, 'count': stat['count'], 'duration_ms': round(stat['duration'] * 1000, 3)}
+                for sql, stat in top[:limit]
+            ],
+        }
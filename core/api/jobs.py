@@ -0,0 +1,169 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import post_cache
+from .models import Job, Like, Post
+from .partitioning import ensure_partitions
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+
+def job_handler(name):
+    """
+    Register a function as the handler for jobs called `name`. Handlers receive
+    the job payload as keyword arguments and run inside a transaction that also
+    removes the job, so their database side effects happen exactly once.
+    """
+    def register(func):
+        handlers[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, run_at=None, max_attempts=5):
+    """
+    Add a job. Called inside the caller's transaction, the job only becomes
+    visible to workers if that transaction commits.
+    """
+    if name not in handlers:
+        raise ValueError(f"No handler registered for job '{name}'")
+    payload = payload or {}
+    if settings.JOB_QUEUE['EAGER']:
+        handlers[name](**payload)
+        return None
+    return Job.objects.create(
+        name=name, payload=payload, max_attempts=max_attempts, run_at=run_at or timezone.now(),
+    )
+
+
+def claim(batch_size):
+    """
+    Lock up to `batch_size` due jobs and mark them running. Rows locked by
+    other workers are skipped instead of waited on.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.PENDING, run_at__lte=now)
+            .order_by('run_at')[:batch_size]
+        )
+        if jobs:
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status=Job.Status.RUNNING, locked_at=now, attempts=F('attempts') + 1,
+            )
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def release_stale():
+    """
+    Return jobs whose worker died while running them to the queue.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_QUEUE['LOCK_TIMEOUT_SECONDS'])
+    return Job.objects.filter(status=Job.Status.RUNNING, locked_at__lt=cutoff).update(
+        status=Job.Status.PENDING, locked_at=None,
+    )
+
+
+def backoff(attempts):
+    config = settings.JOB_QUEUE
+    delay = min(config['RETRY_BASE_SECONDS'] * 2 ** (attempts - 1), config['RETRY_MAX_SECONDS'])
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def run(job):
+    """
+    Run a claimed job. Returns True when it succeeded.
+    """
+    try:
+        with transaction.atomic():
+            handler = handlers.get(job.name)
+            if handler is None:
+                raise LookupError(f"No handler registered for job '{job.name}'")
+            handler(**job.payload)
+            Job.objects.filter(pk=job.pk).delete()
+        return True
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %s", job.pk, job.name, job.attempts)
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(status=Job.Status.FAILED, locked_at=None, last_error=error)
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.Status.PENDING, locked_at=None, last_error=error,
+                run_at=timezone.now() + backoff(job.attempts),
+            )
+        return False
+
+
+@job_handler('noop')
+def noop(**payload):
+    pass
+
+
+@job_handler('maintain_partitions')
+def maintain_partitions(months_ahead):
+    """
+    Create upcoming monthly partitions, then schedule itself for the next day.
+    """
+    for model in (Post, Like):
+        ensure_partitions(model, months_ahead)
+    enqueue('maintain_partitions', {'months_ahead': months_ahead},
+            run_at=timezone.now() + timedelta(days=1))
+
+
+@job_handler('apply_like_delta')
+def apply_like_delta(post_id, delta):
+    Post.all_objects.filter(pk=post_id).update(likes=F('likes') + delta, likes_updated_at=timezone.now())
+    post_cache.invalidate(post_id)
+
+
+@job_handler('invalidate_author_posts')
+def invalidate_author_posts(author_id, after=0, batch_size=500):
+    """
+    Drop the cached posts of a deactivated account one batch at a time, each
+    batch scheduling the next.
+    """
+    post_ids = list(
+        Post.all_objects.filter(author_id=author_id, pk__gt=after).order_by('pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    post_cache.invalidate(*post_ids)
+    if len(post_ids) == batch_size:
+        enqueue('invalidate_author_posts', {'author_id': author_id, 'after': post_ids[-1], 'batch_size': batch_size})
+
+
+@job_handler('process_post_image')
+def process_post_image(post_id):
+    """
+    Downscale oversized uploads and drop their metadata, keeping the
+    orientation it described.
+    """
+    post = Post.all_objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    max_size = settings.JOB_QUEUE['MAX_IMAGE_SIZE']
+    with post.image.open('rb') as fp:
+        image = Image.open(fp)
+        image.load()
+    image_format = image.format
+    if image.width <= max_size and image.height <= max_size and not image.info.get('exif'):
+        return
+    # Apply the EXIF orientation to the pixels before the tag is dropped,
+    # otherwise photos taken in portrait come out rotated.
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_size, max_size))
+    with post.image.storage.open(post.image.name, 'wb') as fp:
+        image.save(fp, format=image_format)
@@ -0,0 +1,82 @@
+"""
+Request-scoped batching of lookups by key, in the style of DataLoader.
+
+Code that knows it will need several objects queues their keys first; the
+next load() fetches everything queued with one query per model and the
+results are memoized for the rest of the request. Get the loaders for a
+request with loaders_for(request).
+"""
+from django.contrib.auth.models import User
+
+from . import post_cache
+
+USER_COLUMNS = ('id', 'username', 'email', 'date_joined', 'is_active')
+
+
+class Loader:
+    def __init__(self, fetch):
+        # `fetch` takes a list of keys and returns {key: object} for the
+        # ones that exist.
+        self.fetch = fetch
+        self.memo = {}
+        self.queued = set()
+
+    def prime(self, key, value):
+        self.memo[key] = value
+        self.queued.discard(key)
+
+    def queue(self, keys):
+        self.queued.update(key for key in keys if key not in self.memo)
+
+    def load_many(self, keys):
+        """
+        Return {key: object} for the given keys that exist, fetching them
+        together with every queued key in a single call.
+        """
+        self.queue(keys)
+        if self.queued:
+            pending, self.queued = list(self.queued), set()
+            found = self.fetch(pending)
+            for key in pending:
+                self.memo[key] = found.get(key)
+        return {key: self.memo[key] for key in keys if self.memo.get(key) is not None}
+
+    def load(self, key):
+        return self.load_many([key]).get(key)
+
+
+class RequestLoaders:
+    """
+    Active users by id and by username, sharing what they load, and visible
+    posts by id through the per-post cache.
+    """
+
+    def __init__(self):
+        self.users = Loader(lambda ids: self._fetch_users(pk__in=ids))
+        self.users_by_username = Loader(lambda names: {
+            user.username: user for user in self._fetch_users(username__in=names).values()
+        })
+        self.posts = Loader(post_cache.get_many)
+
+    def _fetch_users(self, **lookup):
+        users = {user.pk: user for user in User.objects.filter(is_active=True, **lookup).only(*USER_COLUMNS)}
+        for user in users.values():
+            self.add_user(user)
+        return users
+
+    def add_user(self, user):
+        self.users.prime(user.pk, user)
+        self.users_by_username.prime(user.username, user)
+
+
+def loaders_for(request):
+    # Stored on the Django request so the DRF wrapper and middleware see
+    # the same loaders.
+    request = getattr(request, '_request', request)
+    loaders = getattr(request, 'loaders', None)
+    if loaders is None:
+        loaders = request.loaders = RequestLoaders()
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and user.is_active:
+            loaders.add_user(user)
+    return loaders
@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.middleware import brotli, compress
+from api.models import Post
+from api.renderers import MessagePackRenderer, ORJSONRenderer
+from api.serializers import PostSerializer
+
+RENDERERS = {
+    'json': JSONRenderer,
+    'orjson': ORJSONRenderer,
+    'msgpack': MessagePackRenderer,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the size and encode time of one feed page for every response format "
+        "and compression, using the newest posts in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=settings.REST_FRAMEWORK['PAGE_SIZE'])
+        parser.add_argument('--iterations', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        posts = list(Post.objects.select_related('author').order_by('-created_at')[:options['page_size']])
+        if not posts:
+            raise CommandError("No posts found, run `manage.py seed_data` first")
+        page = {
+            'count': Post.objects.count(),
+            'next': 'http://localhost:8000/api/v1/users/feed/?page=2',
+            'previous': None,
+            'results': PostSerializer(posts, many=True).data,
+        }
+        codings = [None, 'gzip'] + (['br'] if brotli is not None else [])
+
+        self.stdout.write(f"{len(posts)} posts per page, {options['iterations']} iterations")
+        self.stdout.write(f"{'format':<10}{'encoding':<10}{'bytes':>10}{'encode us':>12}{'compress us':>13}")
+        for name, renderer_class in RENDERERS.items():
+            renderer = renderer_class()
+            encode = self.time(lambda: renderer.render(page), options['iterations'])
+            content = renderer.render(page)
+            for coding in codings:
+                if coding is None:
+                    size, compress_time = len(content), 0.0
+                else:
+                    size = len(compress(content, coding, settings.COMPRESSION))
+                    compress_time = self.time(
+                        lambda: compress(content, coding, settings.COMPRESSION), options['iterations'],
+                    )
+                self.stdout.write(
+                    f"{name:<10}{coding or 'identity':<10}{size:>10}{encode * 1e6:>12.1f}{compress_time * 1e6:>13.1f}"
+                )
+
+    def time(self, func, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) / iterations
@@ -0,0 +1,33 @@
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Job
+
+
+class Command(BaseCommand):
+    help = "Measure job queue throughput with an increasing number of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=10000)
+        parser.add_argument('--workers', default='1,2,4', help="Comma separated worker counts to try.")
+        parser.add_argument('--batch-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if Job.objects.filter(status=Job.Status.PENDING).exists():
+            raise CommandError("The queue has pending jobs, drain it before benchmarking")
+
+        self.stdout.write(f"{'workers':>8}{'jobs':>10}{'seconds':>10}{'jobs/s':>10}")
+        for processes in [int(count) for count in options['workers'].split(',')]:
+            Job.objects.bulk_create(
+                [Job(name='noop') for _ in range(options['jobs'])], batch_size=1000,
+            )
+            started = time.perf_counter()
+            call_command('run_jobs', processes=processes, batch_size=options['batch_size'],
+                         once=True, stdout=StringIO())
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{processes:>8}{options['jobs']:>10}{elapsed:>10.2f}{options['jobs'] / elapsed:>10.0f}"
+            )
@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import defaultdict
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from api.benchmarks import percentile
+from api.models import Follow
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput and feed latency while both run concurrently, once for "
+        "every password hashing pool size given with --processes (0 hashes in the request thread)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', default='0,2', help="Comma separated pool sizes to try.")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per run.")
+        parser.add_argument('--login-threads', type=int, default=8)
+        parser.add_argument('--feed-threads', type=int, default=2)
+        parser.add_argument('--password', default='password123')
+
+    def handle(self, *args, **options):
+        top = (
+            Follow.objects.values('follower').annotate(n=Count('id')).order_by('-n')
+            .values_list('follower', flat=True).first()
+        )
+        self.user = User.objects.filter(pk=top).first() if top else User.objects.order_by('pk').first()
+        if self.user is None:
+            raise CommandError("The database is empty, run seed_data first")
+        self.password = options['password']
+        if not self.user.check_password(self.password):
+            raise CommandError(f"Could not log in as '{self.user.username}', check --password")
+
+        self.stdout.write(
+            f"{'processes':>9}{'logins/s':>10}{'rejected':>10}{'login p95':>11}"
+            f"{'feed p50':>10}{'feed p95':>10}{'feed/s':>8}"
+        )
+        for processes in [int(count) for count in options['processes'].split(',')]:
+            hashing = {**settings.PASSWORD_HASHING, 'PROCESSES': processes}
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver'], PASSWORD_HASHING=hashing), \
+                    mock.patch.object(APIView, 'throttle_classes', ()):
+                samples = self.run(options)
+            logins, feed = samples['login'], samples['feed']
+            elapsed = options['duration']
+            self.stdout.write(
+                f"{processes:>9}{len(logins) / elapsed:>10.1f}{samples['rejected']:>10}"
+                f"{self.ms(logins, 95):>11}{self.ms(feed, 50):>10}{self.ms(feed, 95):>10}"
+                f"{len(feed) / elapsed:>8.1f}"
+            )
+
+    def ms(self, latencies, pct):
+        return f"{percentile(latencies, pct) * 1000:.1f}" if latencies else '-'
+
+    def run(self, options):
+        samples = defaultdict(list)
+        samples['rejected'] = 0
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['duration']
+
+        def worker(kind):
+            client = APIClient()
+            if kind == 'feed':
+                client.force_authenticate(user=self.user)
+            credentials = {'username': self.user.username, 'password': self.password}
+            try:
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    if kind == 'feed':
+                        response = client.get(reverse('feed'))
+                    else:
+                        response = client.post(reverse('token_obtain_pair'), credentials, format='json')
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        if response.status_code == 200:
+                            samples[kind].append(elapsed)
+                        elif response.status_code == 503:
+                            samples['rejected'] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=('login',)) for _ in range(options['login_threads'])]
+        threads += [threading.Thread(target=worker, args=('feed',)) for _ in range(options['feed_threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples
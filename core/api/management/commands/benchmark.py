@@ -0,0 +1,248 @@
+import json
+import time
+from collections import defaultdict
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from api.benchmarks import compare, format_table, summarize
+from api.instrumentation import count_queries
+from api.models import Follow, Like, Post
+from api.ranking import cache_key
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every API route through the Django test client against the current "
+        "(seeded) database. Writes are rolled back at the end. Reports p50/p95/p99 and mean "
+        "latency and queries/request, optionally comparing against a baseline file."
+    )
+
+    scenarios = (
+        'login', 'token_refresh', 'register', 'user_info', 'following_status', 'follows',
+        'feed', 'feed_ranked', 'user_posts', 'likers', 'post_create', 'post_update', 'post_delete', 'like', 'unlike',
+        'follow', 'unfollow',
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Timed requests per route.")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per route.")
+        parser.add_argument('--routes', help="Comma separated subset of: " + ', '.join(self.scenarios))
+        parser.add_argument('--user', help="Username to benchmark as (default: the user following most people).")
+        parser.add_argument('--password', default='password123')
+        parser.add_argument('--output', help="Write machine readable results to this JSON file.")
+        parser.add_argument('--baseline', help="Compare against a previous --output file.")
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help="Allowed p95 slowdown relative to the baseline (0.2 = 20%%).")
+
+    def handle(self, *args, **options):
+        routes = self.scenarios
+        if options['routes']:
+            routes = [route.strip() for route in options['routes'].split(',')]
+            unknown = set(routes) - set(self.scenarios)
+            if unknown:
+                raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+
+        self.results = {}
+        self.user = self.pick_user(options['user'])
+        self.password = options['password']
+        self.target = (
+            User.objects.exclude(pk=self.user.pk)
+            .annotate(n=Count('posts')).order_by('-n').first()
+        )
+        if self.target is None:
+            raise CommandError("The database needs at least two users, run seed_data first")
+
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']), \
+                mock.patch.object(APIView, 'throttle_classes', ()), \
+                transaction.atomic():
+            self.client = APIClient()
+            self.authenticate()
+            for route in routes:
+                self.samples = defaultdict(lambda: {'latencies': [], 'queries': [], 'errors': 0})
+                self.recording = False
+                getattr(self, f'bench_{route}')(options['warmup'])
+                self.recording = True
+                # Routes that could not run for lack of data still get a row.
+                self.samples[route]
+                getattr(self, f'bench_{route}')(options['requests'])
+                self.results.update(self.collect())
+            transaction.set_rollback(True)
+
+        self.stdout.write(format_table(self.results))
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump({
+                    'created_at': timezone.now().isoformat(),
+                    'requests_per_route': options['requests'],
+                    'dataset': {
+                        'users': User.objects.count(),
+                        'posts': Post.objects.count(),
+                        'likes': Like.objects.count(),
+                        'follows': Follow.objects.count(),
+                    },
+                    'routes': self.results,
+                }, fp, indent=2)
+        if options['baseline']:
+            with open(options['baseline']) as fp:
+                baseline = json.load(fp)['routes']
+            regressions = compare(self.results, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError("Regressions against baseline:\n" + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
+
+    def pick_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"User '{username}' not found")
+        top = (
+            Follow.objects.values('follower').annotate(n=Count('id')).order_by('-n')
+            .values_list('follower', flat=True).first()
+        )
+        user = User.objects.filter(pk=top).first() if top else User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError("The database is empty, run seed_data first")
+        return user
+
+    def authenticate(self):
+        response = self.client.post(
+            reverse('token_obtain_pair'),
+            {'username': self.user.username, 'password': self.password}, format='json',
+        )
+        if response.status_code != 200:
+            raise CommandError(f"Could not log in as '{self.user.username}', check --password")
+        self.refresh = response.data['refresh']
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def request(self, label, method, url, data=None, anonymous=False):
+        client = APIClient() if anonymous else self.client
+        with count_queries() as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data, format='json')
+            latency = time.perf_counter() - started
+        if self.recording:
+            sample = self.samples[label]
+            sample['latencies'].append(latency)
+            sample['queries'].append(queries.count)
+            if response.status_code >= 400:
+                sample['errors'] += 1
+        return response
+
+    def collect(self):
+        return {
+            label: summarize(sample['latencies'], sample['queries'], sample['errors'])
+            for label, sample in self.samples.items()
+        }
+
+    def create_post(self):
+        return Post.objects.create(author=self.user, content="benchmark post")
+
+    def bench_login(self, count):
+        for _ in range(count):
+            self.request('login', 'post', reverse('token_obtain_pair'),
+                         {'username': self.user.username, 'password': self.password}, anonymous=True)
+
+    def bench_token_refresh(self, count):
+        for _ in range(count):
+            self.request('token_refresh', 'post', reverse('token_refresh'),
+                         {'refresh': self.refresh}, anonymous=True)
+
+    def bench_register(self, count):
+        offset = User.objects.count()
+        for i in range(count):
+            username = f'benchmark_{offset}_{i}_{self.recording}'
+            self.request('register', 'post', reverse('register'), {
+                'username': username, 'password': self.password, 'email': f'{username}@example.com',
+            }, anonymous=True)
+
+    def bench_user_info(self, count):
+        url = reverse('user_info', kwargs={'user_identifier': self.target.username})
+        for _ in range(count):
+            self.request('user_info', 'get', url)
+
+    def bench_following_status(self, count):
+        url = reverse('check_following_status', kwargs={'user_identifier': self.target.username})
+        for _ in range(count):
+            self.request('following_status', 'get', url)
+
+    def bench_follows(self, count):
+        for _ in range(count):
+            self.request('follows', 'get', reverse('list_user_follows'))
+
+    def bench_feed(self, count):
+        for _ in range(count):
+            self.request('feed', 'get', reverse('feed'))
+
+    def bench_feed_ranked(self, count):
+        # feed_ranked_cold scores the candidates, feed_ranked reads the
+        # cached ranking like later page views within its lifetime do.
+        for _ in range(count):
+            cache.delete(cache_key(self.user.pk))
+            self.request('feed_ranked_cold', 'get', reverse('feed'), {'mode': 'ranked'})
+            self.request('feed_ranked', 'get', reverse('feed'), {'mode': 'ranked'})
+
+    def bench_user_posts(self, count):
+        url = reverse('retrieve_posts', kwargs={'user_identifier': self.target.username})
+        for _ in range(count):
+            self.request('user_posts', 'get', url)
+
+    def bench_likers(self, count):
+        post = Post.objects.order_by('-likes').first()
+        if post is None:
+            return
+        url = reverse('post_likers', kwargs={'post_id': post.pk})
+        for _ in range(count):
+            self.request('likers', 'get', url)
+
+    def bench_post_create(self, count):
+        for i in range(count):
+            self.request('post_create', 'post', reverse('create_post'), {'content': f"benchmark {i}"})
+
+    def bench_post_update(self, count):
+        url = reverse('update_post', kwargs={'post_id': self.create_post().pk})
+        for i in range(count):
+            self.request('post_update', 'patch', url, {'content': f"edited {i}"})
+
+    def bench_post_delete(self, count):
+        posts = [self.create_post() for _ in range(count)]
+        for post in posts:
+            self.request('post_delete', 'delete', reverse('delete_post', kwargs={'post_id': post.pk}))
+
+    def bench_like(self, count):
+        post = self.create_post()
+        url = reverse('like-post', kwargs={'post_id': post.pk})
+        for _ in range(count):
+            self.request('like', 'post', url)
+            Like.objects.filter(user=self.user, post=post).delete()
+
+    def bench_unlike(self, count):
+        post = self.create_post()
+        url = reverse('like-post', kwargs={'post_id': post.pk})
+        for _ in range(count):
+            Like.objects.create(user=self.user, post=post)
+            self.request('unlike', 'delete', url)
+
+    def bench_follow(self, count):
+        url = reverse('follow_user', kwargs={'username': self.target.username})
+        Follow.objects.filter(follower=self.user, following=self.target).delete()
+        for _ in range(count):
+            self.request('follow', 'post', url)
+            Follow.objects.filter(follower=self.user, following=self.target).delete()
+
+    def bench_unfollow(self, count):
+        url = reverse('follow_user', kwargs={'username': self.target.username})
+        Follow.objects.filter(follower=self.user, following=self.target).delete()
+        for _ in range(count):
+            Follow.objects.create(follower=self.user, following=self.target)
+            self.request('unfollow', 'delete', url)
@@ -0,0 +1,28 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Write the OpenAPI schema to settings.OPENAPI_SCHEMA_FILE so it can be served without introspecting views."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.OPENAPI_SCHEMA_FILE)
+        parser.add_argument('--url', help="Base API url, e.g. https://api.example.com")
+
+    def handle(self, *args, **options):
+        from drf_yasg.codecs import OpenAPICodecJson
+        from drf_yasg.generators import OpenAPISchemaGenerator
+
+        from core.docs import get_openapi_info
+
+        generator = OpenAPISchemaGenerator(get_openapi_info(), url=options['url'])
+        schema = generator.get_schema(request=None, public=True)
+        content = OpenAPICodecJson(validators=[]).encode(schema)
+
+        output = options['output']
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'wb') as fp:
+            fp.write(content)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(schema['paths'])} paths to {output}"))
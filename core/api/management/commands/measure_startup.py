@@ -0,0 +1,48 @@
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROBE = """
+import json, os, sys, time
+started = time.perf_counter()
+import django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', %(settings)r)
+django.setup()
+setup = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls = time.perf_counter()
+print(json.dumps({
+    'setup_ms': (setup - started) * 1000,
+    'urls_ms': (urls - setup) * 1000,
+    'total_ms': (urls - started) * 1000,
+    'modules': len(sys.modules),
+    'drf_yasg_loaded': 'drf_yasg.generators' in sys.modules,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure cold start time (django.setup() plus URLconf import) in fresh interpreters."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        probe = PROBE % {'settings': settings.SETTINGS_MODULE}
+        samples = []
+        for _ in range(options['runs']):
+            result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True)
+            if result.returncode:
+                raise CommandError(result.stderr)
+            samples.append(json.loads(result.stdout))
+
+        for key in ('setup_ms', 'urls_ms', 'total_ms'):
+            values = [sample[key] for sample in samples]
+            self.stdout.write(f"{key:<10} median {statistics.median(values):8.1f}  min {min(values):8.1f}")
+        self.stdout.write(f"modules    {samples[-1]['modules']}")
+        self.stdout.write(f"drf_yasg generators imported: {samples[-1]['drf_yasg_loaded']}")
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from api.jobs import enqueue
+from api.models import Job, Like, Post
+from api.partitioning import (
+    add_months, archive_partitions, ensure_partitions, is_partitioned, month_start, partition_table,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert api_post (and with --likes, api_like) to monthly range partitions on PostgreSQL, "
+        "create upcoming partitions, and detach old ones into the archive schema."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--likes', action='store_true', help="Partition api_like as well.")
+        parser.add_argument('--months-ahead', type=int, default=3)
+        parser.add_argument('--archive-before-months', type=int,
+                            help="Archive partitions whose rows are all older than this many months.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Partitioning requires PostgreSQL")
+
+        models = [Post, Like] if options['likes'] else [Post]
+        for model in models:
+            table = model._meta.db_table
+            if is_partitioned(table):
+                created = ensure_partitions(model, options['months_ahead'])
+            else:
+                created = partition_table(model, options['months_ahead'])
+                self.stdout.write(f"{table}: partitioned, existing rows kept in {table}_legacy")
+            for name in created:
+                self.stdout.write(f"{table}: created {name}")
+
+            if options['archive_before_months']:
+                cutoff = add_months(month_start(), -options['archive_before_months'])
+                for name in archive_partitions(model, cutoff):
+                    self.stdout.write(f"{table}: archived {name}")
+
+        if not Job.objects.filter(name='maintain_partitions', status=Job.Status.PENDING).exists():
+            enqueue('maintain_partitions', {'months_ahead': options['months_ahead']},
+                    run_at=timezone.now() + timedelta(days=1))
@@ -0,0 +1,109 @@
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from api import post_cache
+from api.models import AccountDeletion, Follow, Like, Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove soft-deleted posts and deleted accounts together with their likes, follows, "
+        "posts and media files. Every statement deletes at most --batch-size rows, so large "
+        "accounts or popular posts never hold long locks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--sleep', type=float, default=0.0, help="Pause between batches, in seconds.")
+        parser.add_argument('--loop', action='store_true', help="Keep running and poll for new deletions.")
+        parser.add_argument('--interval', type=float, default=30.0, help="Polling interval with --loop.")
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.sleep = options['sleep']
+        while True:
+            self.deleted = defaultdict(int)
+            self.purge_posts()
+            self.purge_accounts()
+            if self.deleted:
+                summary = ', '.join(f"{count} {name}" for name, count in sorted(self.deleted.items()))
+                self.stdout.write(f"Purged {summary}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def pause(self):
+        if self.sleep:
+            time.sleep(self.sleep)
+
+    def delete_in_batches(self, queryset, name):
+        model = queryset.model
+        while True:
+            ids = list(queryset.values_list('pk', flat=True)[:self.batch_size])
+            if not ids:
+                return
+            deleted, _ = model._base_manager.filter(pk__in=ids).delete()
+            self.deleted[name] += deleted
+            self.pause()
+
+    def purge_posts(self):
+        while True:
+            posts = list(
+                Post.all_objects.filter(deleted_at__isnull=False)
+                .order_by('deleted_at')[:self.batch_size]
+            )
+            if not posts:
+                return
+            for post in posts:
+                self.purge_post(post)
+
+    def purge_post(self, post):
+        self.delete_in_batches(Like.objects.filter(post_id=post.pk), 'likes')
+        if post.image:
+            post.image.delete(save=False)
+        Post.all_objects.filter(pk=post.pk).delete()
+        self.deleted['posts'] += 1
+
+    def purge_accounts(self):
+        for deletion in AccountDeletion.objects.select_related('user').order_by('requested_at'):
+            self.purge_account(deletion.user)
+
+    def purge_account(self, user):
+        # Likes given by the account count towards other users' posts, so
+        # their counters are decremented batch by batch as the rows go away.
+        likes = Like.objects.filter(user=user)
+        while True:
+            ids = list(likes.values_list('pk', flat=True)[:self.batch_size])
+            if not ids:
+                break
+            per_post = (
+                Like.objects.filter(pk__in=ids).values('post_id').annotate(n=Count('pk'))
+                .values_list('post_id', 'n')
+            )
+            by_count = defaultdict(list)
+            for post_id, count in per_post:
+                by_count[count].append(post_id)
+            with transaction.atomic():
+                for count, post_ids in by_count.items():
+                    Post.all_objects.filter(pk__in=post_ids).update(
+                        likes=F('likes') - count, likes_updated_at=timezone.now(),
+                    )
+                    post_cache.invalidate(*post_ids)
+                deleted, _ = Like.objects.filter(pk__in=ids).delete()
+            self.deleted['likes'] += deleted
+            self.pause()
+
+        self.delete_in_batches(Follow.objects.filter(Q(follower=user) | Q(following=user)), 'follows')
+        while True:
+            posts = list(Post.all_objects.filter(author=user)[:self.batch_size])
+            if not posts:
+                break
+            for post in posts:
+                self.purge_post(post)
+        user.delete()
+        self.deleted['accounts'] += 1
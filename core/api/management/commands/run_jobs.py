@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.jobs import claim, release_stale, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Process background jobs. Each worker claims jobs in batches with "
+        "SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers can run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes to fork.")
+        parser.add_argument('--once', action='store_true', help="Exit as soon as no job is due.")
+        parser.add_argument('--sleep', type=float, default=1.0, help="Idle polling interval, in seconds.")
+
+    def handle(self, *args, **options):
+        if options['processes'] == 1:
+            self.report(os.getpid(), *self.work(options))
+            return
+
+        # Children must not share the parent's database connection.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        workers = [
+            context.Process(target=self.child, args=(options, queue))
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        for _ in workers:
+            self.report(*queue.get())
+        for worker in workers:
+            worker.join()
+
+    def child(self, options, queue):
+        try:
+            queue.put((os.getpid(), *self.work(options)))
+        finally:
+            connections.close_all()
+
+    def work(self, options):
+        done = failed = 0
+        last_release = 0.0
+        while True:
+            if time.monotonic() - last_release > 60:
+                release_stale()
+                last_release = time.monotonic()
+            jobs = claim(options['batch_size'])
+            if not jobs:
+                if options['once']:
+                    return done, failed
+                time.sleep(options['sleep'])
+                continue
+            for job in jobs:
+                if run(job):
+                    done += 1
+                else:
+                    failed += 1
+
+    def report(self, pid, done, failed):
+        self.stdout.write(f"worker {pid}: {done} jobs done, {failed} failed")
@@ -0,0 +1,204 @@
+import io
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from api.models import Follow, Like, Post
+
+WORDS = (
+    'django', 'python', 'coffee', 'deploy', 'friday', 'bug', 'feature', 'cache',
+    'query', 'index', 'tweet', 'timeline', 'music', 'football', 'weekend', 'news',
+)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def power_law_counts(rng, n, total, skew, cap):
+    """
+    Split `total` rows over `n` items following a Zipf-like distribution.
+    Ranks are shuffled so the popular items are spread over the id space.
+    """
+    weights = [1 / (rank ** skew) for rank in range(1, n + 1)]
+    rng.shuffle(weights)
+    scale = total / sum(weights)
+    counts = []
+    for weight in weights:
+        expected = weight * scale
+        count = int(expected)
+        if rng.random() < expected - count:
+            count += 1
+        counts.append(min(count, cap))
+    return counts
+
+
+def copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large synthetic dataset (users, posts, likes and power-law follows) "
+        "for load testing. Uses Postgres COPY when available and bulk_create otherwise. "
+        "Timestamps are only spread over --days on the COPY path, since bulk_create "
+        "honours auto_now_add."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--likes', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help="Zipf exponent for follower and like popularity.")
+        parser.add_argument('--days', type=int, default=30,
+                            help="Spread created_at over the last N days.")
+        parser.add_argument('--prefix', default='seed',
+                            help="Username prefix; must not already be in use.")
+        parser.add_argument('--password', default='password123',
+                            help="Password shared by every generated user (hashed once).")
+        parser.add_argument('--copy', dest='copy', action='store_true', default=None,
+                            help="Force the Postgres COPY fast path.")
+        parser.add_argument('--no-copy', dest='copy', action='store_false',
+                            help="Always use bulk_create.")
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError("--users must be at least 2")
+        use_copy = options['copy']
+        if use_copy is None:
+            use_copy = connection.vendor == 'postgresql'
+        elif use_copy and connection.vendor != 'postgresql':
+            raise CommandError("--copy requires a PostgreSQL database")
+
+        self.prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{self.prefix}_').exists():
+            raise CommandError(f"Users with prefix '{self.prefix}_' already exist, pick another --prefix")
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.use_copy = use_copy
+        self.now = timezone.now()
+        self.window = timedelta(days=options['days']).total_seconds()
+
+        started = time.perf_counter()
+        total = 0
+        total += self.create_users(options['users'], make_password(options['password']))
+        total += self.create_follows(options['follows'], options['skew'])
+        total += self.create_posts_and_likes(options['posts'], options['likes'], options['skew'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {total:,} rows in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s, "
+            f"{'COPY' if use_copy else 'bulk_create'})"
+        ))
+
+    def timestamp(self):
+        return self.now - timedelta(seconds=self.rng.random() * self.window)
+
+    def create_users(self, count, password_hash):
+        columns = ('password', 'last_login', 'is_superuser', 'username', 'first_name',
+                   'last_name', 'email', 'is_staff', 'is_active', 'date_joined')
+        rows = (
+            (password_hash, None, False, f'{self.prefix}_{i}', '', '',
+             f'{self.prefix}_{i}@example.com', False, True, self.timestamp())
+            for i in range(count)
+        )
+        inserted = self.insert(User, columns, rows)
+        self.user_ids = list(
+            User.objects.filter(username__startswith=f'{self.prefix}_')
+            .order_by('id').values_list('id', flat=True)
+        )
+        return inserted
+
+    def create_follows(self, total, skew):
+        user_count = len(self.user_ids)
+        counts = power_law_counts(self.rng, user_count, total, skew, user_count - 1)
+
+        def rows():
+            for followee, count in enumerate(counts):
+                if not count:
+                    continue
+                followers = self.rng.sample(range(user_count), count + 1)
+                if followee in followers:
+                    followers.remove(followee)
+                for follower in followers[:count]:
+                    yield (self.user_ids[follower], self.user_ids[followee], self.timestamp())
+
+        return self.insert(Follow, ('follower_id', 'following_id', 'created_at'), rows())
+
+    def create_posts_and_likes(self, post_count, total_likes, skew):
+        user_count = len(self.user_ids)
+        like_counts = power_law_counts(self.rng, post_count, total_likes, skew, user_count)
+        max_post_id = Post.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+        rows = (
+            (self.user_ids[self.rng.randrange(user_count)],
+             f"#{i} " + ' '.join(self.rng.choices(WORDS, k=8)),
+             None, self.timestamp(), like_counts[i])
+            for i in range(post_count)
+        )
+        inserted = self.insert(Post, ('author_id', 'content', 'image', 'created_at', 'likes'), rows)
+        post_ids = list(
+            Post.objects.filter(id__gt=max_post_id).order_by('id').values_list('id', flat=True)
+        )
+
+        def like_rows():
+            for index, count in enumerate(like_counts):
+                for liker in self.rng.sample(range(user_count), count):
+                    yield (self.user_ids[liker], post_ids[index], self.timestamp())
+
+        inserted += self.insert(Like, ('user_id', 'post_id', 'created_at'), like_rows())
+        return inserted
+
+    def insert(self, model, columns, rows):
+        started = time.perf_counter()
+        inserted = 0
+        for chunk in chunked(rows, self.batch_size):
+            if self.use_copy:
+                self.copy(model, columns, chunk)
+            else:
+                model.objects.bulk_create(
+                    [model(**dict(zip(columns, row))) for row in chunk],
+                    batch_size=self.batch_size,
+                )
+            inserted += len(chunk)
+        elapsed = time.perf_counter() - started
+        rate = inserted / elapsed if elapsed else 0
+        self.stdout.write(
+            f"{model._meta.verbose_name_plural}: {inserted:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)"
+        )
+        return inserted
+
+    def copy(self, model, columns, rows):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(copy_value(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        db_columns = ', '.join(quote(model._meta.get_field(name).column) for name in columns)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {quote(model._meta.db_table)} ({db_columns}) FROM STDIN", buffer
+            )
@@ -0,0 +1,197 @@
+import atexit
+import glob
+import json
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+METRICS = {
+    'http_requests_total': ('counter', "Requests handled, by route, method and status code."),
+    'http_request_duration_seconds': ('histogram', "Request latency by route and method."),
+    'db_queries_total': ('counter', "SQL statements executed, by route."),
+    'db_query_duration_seconds_total': ('counter', "Time spent executing SQL, by route."),
+    'cache_requests_total': ('counter', "Cache lookups by result (hit or miss)."),
+    'throttle_rejections_total': ('counter', "Requests rejected by DRF throttling, by route."),
+}
+
+
+class Registry:
+    """
+    In-process metric storage. Updates only hold a lock for a couple of dict
+    operations. When settings.METRICS['MULTIPROCESS_DIR'] is set, every process
+    periodically writes a snapshot there and the exposition merges all of them.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.pid = os.getpid()
+            self.counters = {}
+            self.histograms = {}
+            self.last_flush = 0.0
+            # Threads share the per-process snapshot file, so flushes run
+            # one at a time.
+            self.flush_lock = threading.Lock()
+
+    def _check_fork(self):
+        # A forked worker must not report the parent's samples as its own.
+        if self.pid != os.getpid():
+            self.reset()
+
+    def inc(self, name, labels=(), value=1):
+        self._check_fork()
+        key = (name, tuple(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        self.maybe_flush()
+
+    def observe(self, name, labels, value, buckets=DEFAULT_BUCKETS):
+        self._check_fork()
+        key = (name, tuple(labels))
+        index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0, list(buckets)]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [
+                    [name, list(labels), list(counts), total, count, bounds]
+                    for (name, labels), (counts, total, count, bounds) in self.histograms.items()
+                ],
+            }
+
+    def maybe_flush(self):
+        directory = settings.METRICS.get('MULTIPROCESS_DIR')
+        if not directory:
+            return
+        # Another thread flushing right now writes these samples too.
+        if not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if now - self.last_flush < settings.METRICS.get('FLUSH_INTERVAL', 1.0):
+                return
+            self.last_flush = now
+            self._write(directory)
+        finally:
+            self.flush_lock.release()
+
+    def flush(self, directory):
+        with self.flush_lock:
+            self._write(directory)
+
+    def _write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w') as fp:
+            json.dump(self.snapshot(), fp)
+        os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        """
+        Return merged samples from this process and, in multiprocess mode,
+        from the snapshots written by every other process.
+        """
+        snapshots = [self.snapshot()]
+        directory = settings.METRICS.get('MULTIPROCESS_DIR')
+        if directory:
+            self.flush(directory)
+            own = os.path.join(directory, f'{os.getpid()}.json')
+            for path in glob.glob(os.path.join(directory, '*.json')):
+                if path == own:
+                    continue
+                try:
+                    with open(path) as fp:
+                        snapshots.append(json.load(fp))
+                except (OSError, ValueError):
+                    continue
+
+        counters, histograms = {}, {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(tuple(label) for label in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, counts, total, count, bounds in snapshot['histograms']:
+                key = (name, tuple(tuple(label) for label in labels))
+                merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0, bounds])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+        return counters, histograms
+
+
+registry = Registry()
+
+
+@atexit.register
+def _flush_on_exit():
+    directory = getattr(settings, 'METRICS', {}).get('MULTIPROCESS_DIR') if settings.configured else None
+    if directory and (registry.counters or registry.histograms):
+        registry.flush(directory)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """
+    Render all metrics in the Prometheus text exposition format.
+    """
+    counters, histograms = registry.collect()
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        else:
+            for (metric, labels), (counts, total, count, bounds) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket in zip(list(bounds) + [math.inf], counts):
+                    cumulative += bucket
+                    bucket_labels = labels + (('le', _format_value(float(bound))),)
+                    lines.append(f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+                lines.append(f'{name}_count{_format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    token = settings.METRICS.get('TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
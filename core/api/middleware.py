@@ -0,0 +1,237 @@
+import cProfile
+import gzip
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .instrumentation import QueryCounter, SQLRecorder, wrap_connections
+from .metrics import registry
+from .routers import begin_request, end_request
+
+# Only one cProfile profiler can be active per process on Python 3.12+.
+_profiling = threading.Lock()
+
+
+class MetricsMiddleware:
+    """
+    Records per-route latency, status codes, SQL time and throttle rejections
+    into the in-process metrics registry served at /metrics.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS.get('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with wrap_connections(queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = match.route if match else '<unmatched>'
+        registry.observe('http_request_duration_seconds', (('route', route), ('method', request.method)), elapsed)
+        registry.inc('http_requests_total', (
+            ('route', route), ('method', request.method), ('status', str(response.status_code)),
+        ))
+        registry.inc('db_queries_total', (('route', route),), queries.count)
+        registry.inc('db_query_duration_seconds_total', (('route', route),), queries.duration)
+        if response.status_code == 429:
+            registry.inc('throttle_rejections_total', (('route', route),))
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a random sample of requests, or requests carrying the configured
+    header, with cProfile. Each profile is written to settings.PROFILING['DIRECTORY']
+    as a .prof file next to a .json file describing the route, user and SQL.
+    Only the newest MAX_FILES profiles are kept. When disabled the middleware
+    removes itself from the chain.
+    """
+
+    def __init__(self, get_response):
+        config = settings.PROFILING
+        if not config.get('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config.get('SAMPLE_RATE', 0.0)
+        self.header = config.get('HEADER', 'X-Profile')
+        self.token = config.get('HEADER_TOKEN')
+        self.directory = config['DIRECTORY']
+        self.max_files = config.get('MAX_FILES', 200)
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        if not _profiling.acquire(blocking=False):
+            # Another thread is profiling, serve this request unprofiled.
+            return self.get_response(request)
+
+        recorder = SQLRecorder()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            with wrap_connections(recorder):
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+        finally:
+            _profiling.release()
+        elapsed = time.perf_counter() - started
+
+        profile_id = self.save(request, response, profiler, recorder, elapsed)
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    def should_profile(self, request):
+        value = request.headers.get(self.header)
+        if value is not None and (value == self.token if self.token else settings.DEBUG):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def save(self, request, response, profiler, recorder, elapsed):
+        os.makedirs(self.directory, exist_ok=True)
+        match = request.resolver_match
+        route = match.route if match else request.path
+        profile_id = '{}-{}-{}'.format(
+            timezone.now().strftime('%Y%m%dT%H%M%S'),
+            (match.url_name if match and match.url_name else 'unmatched'),
+            uuid.uuid4().hex[:8],
+        )
+        path = os.path.join(self.directory, profile_id)
+        profiler.dump_stats(f'{path}.prof')
+
+        user = getattr(request, 'user', None)
+        with open(f'{path}.json', 'w') as fp:
+            json.dump({
+                'id': profile_id,
+                'method': request.method,
+                'path': request.path,
+                'route': route,
+                'status': response.status_code,
+                'user': user.username if user is not None and user.is_authenticated else None,
+                'duration_ms': round(elapsed * 1000, 3),
+                'sql': recorder.summary(),
+            }, fp, indent=2)
+
+        self.rotate()
+        return profile_id
+
+    def rotate(self):
+        profiles = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith('.prof')),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in profiles[:max(len(profiles) - self.max_files, 0)]:
+            base = entry.path[:-len('.prof')]
+            for suffix in ('.prof', '.json'):
+                try:
+                    os.remove(base + suffix)
+                except FileNotFoundError:
+                    pass
+
+
+class ReplicaPinningMiddleware:
+    """
+    Gives PrimaryReplicaRouter access to the current request so reads can
+    stick to the primary after the user has written.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = begin_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            end_request(token)
+
+
+def accepted_encodings(header):
+    """
+    Return the codings listed in an Accept-Encoding header, minus those
+    refused with q=0.
+    """
+    codings = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        params = params.replace(' ', '')
+        if coding and params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            codings.add(coding.lower())
+    return codings
+
+
+def compress(content, coding, config):
+    if coding == 'br':
+        return brotli.compress(content, quality=config.get('BROTLI_QUALITY', 4))
+    return gzip.compress(content, compresslevel=config.get('GZIP_LEVEL', 6), mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compresses API responses larger than COMPRESSION['MIN_SIZE'] bytes with
+    brotli when the client accepts it and the package is installed, gzip
+    otherwise. Small bodies are sent as is since compressing them costs more
+    CPU than it saves on the wire.
+    """
+
+    def __init__(self, get_response):
+        config = settings.COMPRESSION
+        if not config.get('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.config = config
+        self.min_size = config.get('MIN_SIZE', 1024)
+        self.content_types = tuple(config.get('CONTENT_TYPES', ('application/json', 'application/msgpack')))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(self.content_types):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < self.min_size:
+            return response
+
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        if brotli is not None and 'br' in accepted:
+            coding = 'br'
+        elif 'gzip' in accepted:
+            coding = 'gzip'
+        else:
+            return response
+
+        content = compress(response.content, coding, self.config)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = coding
+        # Same rule as django.middleware.gzip: a strong ETag no longer
+        # matches the bytes sent.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
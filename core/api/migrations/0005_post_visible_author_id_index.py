@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 15:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_post_author_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['author', 'id'], include=('created_at',), name='post_visible_author_id_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 15:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_post_visible_author_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['post', 'created_at'], name='like_post_created_idx'),
+        ),
+    ]
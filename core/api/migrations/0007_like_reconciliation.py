@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19 16:15
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_like_post_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Checkpoint',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('position', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='like',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='like_created_at_brin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('likes_updated_at__isnull', False)), fields=['likes_updated_at'], name='post_likes_updated_at_idx'),
+        ),
+    ]
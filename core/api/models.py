@@ -1,5 +1,20 @@
-from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import BrinIndex
+from django.db import models
+from django.utils import timezone
+
+
+class VisiblePostManager(models.Manager):
+    """
+    Hides soft-deleted posts. Rows stay in place until `manage.py
+    purge_deleted` removes them. Posts of deactivated accounts are left out
+    where they are looked up instead, through the author or follow being
+    filtered on, so most post queries do not join auth_user.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 
 class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="posts")
@@ -7,6 +22,25 @@ class Post(models.Model):
     image = models.ImageField(upload_to='media/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     likes = models.IntegerField(default=0)
+    # Set whenever `likes` is changed, so `manage.py reconcile_likes` can
+    # check only the posts touched since its last run.
+    likes_updated_at = models.DateTimeField(null=True, blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = VisiblePostManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at'], name='post_deleted_at_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+            models.Index(fields=['author', '-created_at'], name='post_author_created_idx'),
+            # Lets the feed delta count new posts with an index-only scan.
+            models.Index(fields=['author', 'id'], include=['created_at'], name='post_visible_author_id_idx',
+                         condition=models.Q(deleted_at__isnull=True)),
+            models.Index(fields=['likes_updated_at'], name='post_likes_updated_at_idx',
+                         condition=models.Q(likes_updated_at__isnull=False)),
+        ]
     
     def __str__(self):
         return self.content
@@ -16,7 +50,64 @@ class Like(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created_at'], name='like_post_created_idx'),
+            # Likes are inserted in created_at order, so a BRIN index finds
+            # recent ones for `manage.py reconcile_likes` at almost no cost.
+            BrinIndex(fields=['created_at'], name='like_created_at_brin_idx'),
+        ]
+
 class Follow(models.Model):
     follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name="following")
     following = models.ForeignKey(User, on_delete=models.CASCADE, related_name="followers")
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class AccountDeletion(models.Model):
+    """
+    Marks an account deleted by its owner. The user is deactivated right away
+    and purged together with everything it owns by `manage.py purge_deleted`.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="deletion")
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+
+class Job(models.Model):
+    """
+    Durable background job, enqueued in the same transaction as the write that
+    triggers it and claimed by `manage.py run_jobs` workers with SKIP LOCKED.
+    Successful jobs are deleted, jobs out of attempts are kept as failed.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        RUNNING = 'running'
+        FAILED = 'failed'
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['run_at'], name='job_pending_idx', condition=models.Q(status='pending')),
+            models.Index(fields=['locked_at'], name='job_running_idx', condition=models.Q(status='running')),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class Checkpoint(models.Model):
+    """
+    Where an incremental maintenance command stopped, e.g. the start time of
+    the last complete `manage.py reconcile_likes` run.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    position = models.DateTimeField()
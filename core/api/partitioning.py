@@ -0,0 +1,244 @@
+"""
+Optional PostgreSQL layout that range-partitions api_post (and optionally
+api_like) by month on created_at.
+
+The existing table is not copied: it is renamed to <table>_legacy and attached
+as the partition holding everything before the first monthly boundary, so it
+naturally becomes the cold tier. A DEFAULT partition, <table>_default, takes
+rows beyond the last monthly partition so inserts never fail when the
+maintain_partitions job falls behind; ensure_partitions moves them out as their
+month gets created. Postgres requires the partition key in every
+unique constraint, so the primary key becomes (id, created_at) and foreign keys
+pointing at a partitioned table are dropped; Django already enforces
+on_delete=CASCADE itself.
+"""
+import re
+from datetime import date, datetime, timezone
+
+from django.db import connection, transaction
+
+ARCHIVE_SCHEMA = 'archive'
+
+_upper_bound = re.compile(r"TO \('([^']+)'\)")
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def month_start(value=None):
+    value = value or datetime.now(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def is_partitioned(table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def partitions(table):
+    """
+    Return {partition name: upper bound date} for every partition of `table`.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+    bounds = {}
+    for name, bound in rows:
+        match = _upper_bound.search(bound)
+        bounds[name] = datetime.fromisoformat(match.group(1)).date() if match else None
+    return bounds
+
+
+def partition_table(model, months_ahead=3):
+    """
+    Turn the table of `model` into a monthly range-partitioned table in place.
+    Runs in a single transaction holding an exclusive lock on the table; its
+    duration is dominated by one unique index build and foreign key validation.
+    """
+    table = model._meta.db_table
+    pk_column = model._meta.pk.column
+    legacy = f'{table}_legacy'
+    boundary = add_months(month_start(), 1)
+    quote = connection.ops.quote_name
+
+    if is_partitioned(table):
+        raise ValueError(f"{table} is already partitioned")
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Tables with pending deferred constraint checks cannot be altered.
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        # Foreign keys can only reference a partitioned table through a unique
+        # constraint on (id, created_at), which no other table has.
+        cursor.execute(
+            """
+            SELECT conrelid::regclass::text, conname FROM pg_constraint
+            WHERE contype = 'f' AND confrelid = to_regclass(%s)
+            """,
+            [table],
+        )
+        for referencing, name in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE {referencing} DROP CONSTRAINT {quote(name)}")
+
+        cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid), confrelid::regclass::text FROM pg_constraint
+            WHERE contype = 'f' AND conrelid = to_regclass(%s)
+            """,
+            [table],
+        )
+        outgoing = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT index.relname, pg_get_indexdef(pg_index.indexrelid), pg_index.indisunique
+            FROM pg_index JOIN pg_class index ON index.oid = pg_index.indexrelid
+            WHERE pg_index.indrelid = to_regclass(%s) AND NOT pg_index.indisprimary
+            """,
+            [table],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE contype = 'p' AND conrelid = to_regclass(%s)", [table]
+        )
+        (primary_key,) = cursor.fetchone()
+        cursor.execute(f"SELECT COALESCE(MAX({quote(pk_column)}), 0) + 1 FROM {quote(table)}")
+        (next_id,) = cursor.fetchone()
+
+        for name, _, unique in indexes:
+            if unique:
+                raise ValueError(f"Unique index {name} cannot be kept on a partitioned table")
+
+        cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}")
+        for name, _, _ in indexes:
+            cursor.execute(f"ALTER INDEX {quote(name)} RENAME TO {quote(name[:56] + '_legacy')}")
+        for name, _, _ in outgoing:
+            cursor.execute(f"ALTER TABLE {quote(legacy)} DROP CONSTRAINT {quote(name)}")
+        cursor.execute(f"ALTER TABLE {quote(legacy)} ALTER COLUMN {quote(pk_column)} DROP IDENTITY IF EXISTS")
+        cursor.execute(
+            f"CREATE UNIQUE INDEX {quote(legacy + '_pkey_new')} ON {quote(legacy)} ({quote(pk_column)}, created_at)"
+        )
+        cursor.execute(f"ALTER TABLE {quote(legacy)} DROP CONSTRAINT {quote(primary_key)}")
+        cursor.execute(
+            f"ALTER TABLE {quote(legacy)} ADD CONSTRAINT {quote(legacy + '_pkey')} "
+            f"PRIMARY KEY USING INDEX {quote(legacy + '_pkey_new')}"
+        )
+
+        cursor.execute(
+            f"CREATE TABLE {quote(table)} (LIKE {quote(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE (created_at)"
+        )
+        cursor.execute(f"ALTER TABLE {quote(table)} ADD PRIMARY KEY ({quote(pk_column)}, created_at)")
+        sequence = f'{table}_{pk_column}_seq'
+        cursor.execute(f"CREATE SEQUENCE {quote(sequence)} OWNED BY {quote(table)}.{quote(pk_column)}")
+        cursor.execute("SELECT setval(%s, %s, false)", [sequence, next_id])
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ALTER COLUMN {quote(pk_column)} SET DEFAULT nextval(%s::regclass)",
+            [sequence],
+        )
+
+        # A validated CHECK lets ATTACH skip scanning the legacy table.
+        cursor.execute(
+            f"ALTER TABLE {quote(legacy)} ADD CONSTRAINT {quote(legacy + '_bound')} "
+            f"CHECK (created_at IS NOT NULL AND created_at < %s) NOT VALID",
+            [boundary],
+        )
+        cursor.execute(f"ALTER TABLE {quote(legacy)} VALIDATE CONSTRAINT {quote(legacy + '_bound')}")
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(legacy)} FOR VALUES FROM (MINVALUE) TO (%s)",
+            [boundary],
+        )
+        cursor.execute(f"ALTER TABLE {quote(legacy)} DROP CONSTRAINT {quote(legacy + '_bound')}")
+
+        # The definitions were read before the rename, so they target the new
+        # parent; equivalent indexes on the legacy partition get attached
+        # instead of rebuilt.
+        for name, definition, _ in indexes:
+            cursor.execute(definition)
+        for name, definition, target in outgoing:
+            if is_partitioned(target):
+                continue
+            cursor.execute(f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}")
+
+    return ensure_partitions(model, months_ahead)
+
+
+def ensure_partitions(model, months_ahead=3):
+    """
+    Create the monthly partitions up to `months_ahead` months from now, and the
+    default partition if it is missing. Returns the names of the partitions
+    created.
+    """
+    table = model._meta.db_table
+    if not is_partitioned(table):
+        return []
+    existing = partitions(table)
+    default = f'{table}_default'
+    start = max(bound for bound in existing.values() if bound is not None)
+    end = add_months(month_start(), months_ahead + 1)
+    created = []
+    quote = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        month = start
+        while month < end:
+            name = f'{table}_p{month:%Y%m}'
+            bounds = [month, add_months(month, 1)]
+            if name not in existing:
+                if default in existing:
+                    # A new range may not overlap rows already in the default
+                    # partition, so those are moved into the table before it
+                    # is attached.
+                    cursor.execute(
+                        f"CREATE TABLE {quote(name)} "
+                        f"(LIKE {quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                    )
+                    cursor.execute(
+                        f"WITH moved AS (DELETE FROM {quote(default)} WHERE created_at >= %s AND created_at < %s "
+                        f"RETURNING *) INSERT INTO {quote(name)} SELECT * FROM moved",
+                        bounds,
+                    )
+                    cursor.execute(
+                        f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)",
+                        bounds,
+                    )
+                else:
+                    cursor.execute(
+                        f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)",
+                        bounds,
+                    )
+                created.append(name)
+            month = add_months(month, 1)
+        if default not in existing:
+            cursor.execute(f"CREATE TABLE {quote(default)} PARTITION OF {quote(table)} DEFAULT")
+            created.append(default)
+    return created
+
+
+def archive_partitions(model, before):
+    """
+    Detach partitions holding only rows older than `before` (a date) and move
+    them to the archive schema. Archived rows leave every query on the model
+    but stay available for ad-hoc SQL.
+    """
+    table = model._meta.db_table
+    archived = []
+    quote = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {quote(ARCHIVE_SCHEMA)}")
+        for name, upper in sorted(partitions(table).items()):
+            if upper is None or upper > before:
+                continue
+            cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}")
+            cursor.execute(f"ALTER TABLE {quote(name)} SET SCHEMA {quote(ARCHIVE_SCHEMA)}")
+            archived.append(name)
+    return archived
@@ -0,0 +1,87 @@
+"""
+Read-through cache of visible posts (not deleted, active author), one entry per post id, holding the Post
+with its author's username so it can be serialized without queries.
+
+Every change to a cached row has to call invalidate(): edits, deletes, like
+count updates and author deactivation. Deactivation first calls
+hide_author(), since invalidating every post of a large account is left to a
+background job.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Post
+
+_columns = [field.name for field in Post._meta.concrete_fields]
+
+
+def key(post_id):
+    return f'post:{post_id}'
+
+
+def hidden_author_key(author_id):
+    return f'post:hidden-author:{author_id}'
+
+
+def get_many(post_ids):
+    """
+    Return {id: Post} for the visible posts among `post_ids`, with one cache
+    round trip, a second one when there are hits, and at most one query for
+    the misses.
+    """
+    post_ids = list(dict.fromkeys(int(post_id) for post_id in post_ids))
+    cached = cache.get_many([key(post_id) for post_id in post_ids])
+    posts = {post.pk: post for post in cached.values()}
+    if posts:
+        # Posts of accounts closed since they were cached count as misses,
+        # the query below leaves them out.
+        hidden = cache.get_many([hidden_author_key(author_id) for author_id in {
+            post.author_id for post in posts.values()
+        }])
+        if hidden:
+            posts = {
+                post_id: post for post_id, post in posts.items()
+                if hidden_author_key(post.author_id) not in hidden
+            }
+    missing = [post_id for post_id in post_ids if post_id not in posts]
+    if missing:
+        loaded = {
+            post.pk: post for post in
+            Post.objects.select_related('author')
+            .only(*_columns, 'author__username', 'author__is_active')
+            .filter(pk__in=missing, author__is_active=True)
+        }
+        if loaded:
+            cache.set_many({key(post.pk): post for post in loaded.values()}, settings.POST_CACHE_TIMEOUT)
+        posts.update(loaded)
+    return posts
+
+
+def get(post_id):
+    """
+    Return the visible post `post_id`, raising Post.DoesNotExist if there is none.
+    """
+    post = get_many([post_id]).get(int(post_id))
+    if post is None:
+        raise Post.DoesNotExist
+    return post
+
+
+def hide_author(author_id):
+    """
+    Stop serving the cached posts of `author_id` right away. Entries cached
+    before this call expire within POST_CACHE_TIMEOUT, so the marker only
+    needs to live that long.
+    """
+    cache.set(hidden_author_key(author_id), True, settings.POST_CACHE_TIMEOUT)
+
+
+def invalidate(*post_ids):
+    keys = [key(post_id) for post_id in post_ids]
+    if not keys:
+        return
+    # Deleting again after commit drops entries a concurrent reader may have
+    # refilled from the old row in between.
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,94 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.functional import SimpleLazyObject, empty
+
+_request_state = ContextVar('replica_routing_state', default=None)
+
+
+def pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def begin_request(request):
+    return _request_state.set({
+        'request': request, 'pinned': False, 'wrote': False, 'checked_user': None, 'pin_saved': False,
+    })
+
+
+def end_request(token):
+    state = _request_state.get()
+    if state is not None and state['wrote'] and not state['pin_saved']:
+        _save_pin(state)
+    _request_state.reset(token)
+
+
+def _current_user(state):
+    # Never force the lazy session user from inside the router: resolving it
+    # would itself run a query and re-enter db_for_read(). DRF replaces it
+    # with the authenticated user once the view has authenticated.
+    user = state['request'].__dict__.get('user')
+    if isinstance(user, SimpleLazyObject):
+        if user._wrapped is empty:
+            return None
+        user = user._wrapped
+    if user is None or not user.is_authenticated:
+        return None
+    return user
+
+
+def _save_pin(state):
+    user = _current_user(state)
+    if user is not None:
+        cache.set(pin_key(user.pk), 1, settings.REPLICA_STICKY_SECONDS)
+        state['pin_saved'] = True
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends writes to the primary and reads to a random replica from
+    settings.DATABASE_REPLICAS. Once a request has written, the rest of it
+    reads from the primary, and so do the user's requests for the following
+    REPLICA_STICKY_SECONDS, so clients always see their own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or connections['default'].in_atomic_block:
+            return 'default'
+        state = _request_state.get()
+        if state is not None and self._is_pinned(state):
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['pinned'] = state['wrote'] = True
+            if not state['pin_saved']:
+                _save_pin(state)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+    def _is_pinned(self, state):
+        if state['pinned']:
+            return True
+        user = _current_user(state)
+        if user is None or state['checked_user'] == user.pk:
+            return False
+        state['checked_user'] = user.pk
+        state['pinned'] = cache.get(pin_key(user.pk)) is not None
+        return state['pinned']
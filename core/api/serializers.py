@@ -1,8 +1,77 @@
-from .models import Post
+from .loaders import loaders_for
+from .models import Like, Post
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db import models
 
-class UserSerializer(serializers.ModelSerializer):
+
+def requested_fields(request, available):
+    """
+    Return the names from `available` selected by the ?fields= and ?exclude=
+    query parameters of a GET request, or None when neither is given.
+    """
+    if request is None or request.method != 'GET':
+        return None
+    fields = request.query_params.get('fields')
+    exclude = request.query_params.get('exclude')
+    if fields is None and exclude is None:
+        return None
+    selected = list(available)
+    for param, value in (('fields', fields), ('exclude', exclude)):
+        if value is None:
+            continue
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = names - set(available)
+        if unknown:
+            raise serializers.ValidationError({param: f"Unknown field(s): {', '.join(sorted(unknown))}"})
+        if param == 'fields':
+            selected = [name for name in selected if name in names]
+        else:
+            selected = [name for name in selected if name not in names]
+    return selected
+
+
+class SparseFieldsMixin:
+    """
+    Lets GET requests trim the response with ?fields=a,b or ?exclude=c.
+    `field_sources` maps output fields to the model columns they read, for
+    those whose name differs; a double underscore marks a related column and
+    None a field computed without one.
+    """
+    field_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = requested_fields(self.context.get('request'), self.readable_fields())
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                if not self.fields[name].write_only:
+                    self.fields.pop(name)
+
+    @classmethod
+    def readable_fields(cls):
+        write_only = {name for name, options in getattr(cls.Meta, 'extra_kwargs', {}).items()
+                      if options.get('write_only')}
+        return [name for name in cls.Meta.fields if name not in write_only]
+
+    @classmethod
+    def sparse_queryset(cls, queryset, request, required=()):
+        """
+        Load only the columns the response needs, plus the `required` ones,
+        and join related tables only when one of their columns is requested.
+        """
+        selected = requested_fields(request, cls.readable_fields())
+        if selected is None:
+            selected = cls.readable_fields()
+        columns = [cls.field_sources.get(name, name) for name in selected]
+        columns = [column for column in columns if column is not None]
+        related = {column.split('__')[0] for column in columns if '__' in column}
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(queryset.model._meta.pk.name, *required, *columns)
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'password', 'date_joined')
@@ -18,18 +87,78 @@ class UserSerializer(serializers.ModelSerializer):
         )
         return user
     
-class PostSerializer(serializers.ModelSerializer):
-    author = serializers.CharField(source='author.username', read_only=True)
+class PostListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Queue the authors that were not joined in so the first lookup loads
+        # them all.
+        request = self.context.get('request')
+        if request is not None and 'author' in self.child.fields:
+            posts = data.all() if isinstance(data, models.Manager) else data
+            loaders_for(request).users.queue(
+                post.author_id for post in posts if not Post.author.is_cached(post)
+            )
+        return super().to_representation(data)
+
+
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    field_sources = {'author': 'author__username'}
+
+    author = serializers.SerializerMethodField()
     content = serializers.CharField(required=False, allow_blank=True)
     image = serializers.ImageField(required=False, allow_null=True)
 
     class Meta:
         model = Post
         fields = ('id', 'author', 'content', 'image', 'created_at', 'likes')
+        list_serializer_class = PostListSerializer
+
+    def get_author(self, obj):
+        request = self.context.get('request')
+        if request is None or Post.author.is_cached(obj):
+            return obj.author.username
+        author = loaders_for(request).users.load(obj.author_id)
+        return author.username if author is not None else None
     
+    def update(self, instance, validated_data):
+        # Only write the edited columns, so an instance read from the post
+        # cache never overwrites newer like counts.
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
     def validate(self, data):
         content = data.get('content', '')
         image = data.get('image', None)
         if not content and not image:
             raise serializers.ValidationError("Either content or image must be provided.")
-        return data
\ No newline at end of file
+        return data
+
+
+class FeedPostSerializer(PostSerializer):
+    """
+    Feed item with the number of accounts the reader follows that liked the
+    post, read from the `liked_by_following` map ({post id: count}) that the
+    view computes for the whole page.
+    """
+    field_sources = {**PostSerializer.field_sources, 'liked_by_following': None}
+
+    liked_by_following = serializers.SerializerMethodField()
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ('liked_by_following',)
+
+    def get_liked_by_following(self, obj):
+        return self.context.get('liked_by_following', {}).get(obj.pk, 0)
+
+
+class LikerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    field_sources = {'id': 'user_id', 'username': 'user__username', 'liked_at': 'created_at'}
+
+    id = serializers.IntegerField(source='user_id', read_only=True)
+    username = serializers.CharField(source='user.username', read_only=True)
+    liked_at = serializers.DateTimeField(source='created_at', read_only=True)
+
+    class Meta:
+        model = Like
+        fields = ('id', 'username', 'liked_at')
@@ -0,0 +1,104 @@
+import asyncio
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from . import post_cache
+from .events import author_channel, get_broker
+from .models import Follow
+from .serializers import PostSerializer
+
+
+def _authenticate(request):
+    # EventSource cannot set headers, so the access token may also be passed
+    # as ?token=.
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else request.GET.get('token')
+    if raw_token is None:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        # AuthenticationFailed is raised for deactivated or deleted accounts.
+        return None
+
+
+def _subscribe_channels(request):
+    try:
+        user = _authenticate(request)
+        if user is None:
+            return None
+        following = Follow.objects.filter(
+            follower=user, following__is_active=True,
+        ).values_list('following_id', flat=True)
+        return [author_channel(user.pk)] + [author_channel(user_id) for user_id in following]
+    finally:
+        # Django only closes the request's connection once the response is
+        # finished, which for a stream could be hours; release it now so idle
+        # streams do not each hold a database connection.
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def _post_data(post_id):
+    try:
+        post = post_cache.get_many([post_id]).get(post_id)
+        return None if post is None else PostSerializer(post).data
+    finally:
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def _format(event):
+    return b'event: ' + event['type'].encode() + b'\ndata: ' + orjson.dumps(event['data']) + b'\n\n'
+
+
+async def _events(channels):
+    broker = get_broker()
+    subscription = broker.subscribe(channels)
+    heartbeat = settings.EVENTS['HEARTBEAT_SECONDS']
+    try:
+        yield b'retry: 5000\n\n'
+        while True:
+            try:
+                event = await subscription.get(heartbeat)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing idle connections.
+                yield b': ping\n\n'
+                continue
+            if event is None:
+                yield b'event: overflow\ndata: {}\n\n'
+                return
+            if event['type'] == 'post':
+                # Every subscriber after the first reads it from the cache.
+                data = await sync_to_async(_post_data)(event['post_id'])
+                if data is None:
+                    # Deleted before it was delivered.
+                    continue
+                event = {'type': 'post', 'data': data}
+            yield _format(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def feed_stream(request):
+    """
+    Server-Sent Events stream of new posts and like counts from the
+    authenticated user and the accounts they follow. Follows made after
+    connecting apply on the next reconnect. Needs an ASGI server; each idle
+    connection only costs a suspended coroutine and an empty queue.
+    """
+    channels = await sync_to_async(_subscribe_channels)(request)
+    if channels is None:
+        return JsonResponse({'detail': "Authentication credentials were not provided."}, status=401)
+    response = StreamingHttpResponse(_events(channels), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,9 +1,57 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import msgpack
+import numpy as np
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import warnings
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher as DjangoPBKDF2PasswordHasher
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, transaction
+from django.db.models import Count, F
+from django.test.utils import CaptureQueriesContext
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth.models import User
+from PIL import Image
+from rest_framework.exceptions import APIException
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
-from .models import Post, Follow, Like
+from rest_framework_simplejwt.tokens import AccessToken
+from . import middleware, post_cache
+from .benchmarks import summarize
+from .events import InProcessBroker, PostgresBroker, author_channel, get_broker
+from .hashers import HashingUnavailable, PooledPBKDF2PasswordHasher
+from .jobs import apply_like_delta, enqueue, invalidate_author_posts, job_handler, release_stale
+from .loaders import Loader
+from .metrics import registry
+from .middleware import brotli
+from .models import Checkpoint, Job, Post, Follow, Like
+from .partitioning import (
+    ARCHIVE_SCHEMA, add_months, archive_partitions, ensure_partitions, is_partitioned, month_start, partitions,
+)
+from .ranking import cache_key as ranking_cache_key, score
+from .routers import PrimaryReplicaRouter, begin_request, end_request, pin_key
+from .serializers import PostSerializer
+from .views import LikersPagination
 
 
 class UserRegistrationTests(APITestCase):
@@ -503,4 +551,1634 @@ class LikeTests(APITestCase):
         
         
         self.post.refresh_from_db()
-        self.assertEqual(self.post.likes, 0)
\ No newline at end of file
+        self.assertEqual(self.post.likes, 0)
+
+
+class SeedDataCommandTests(TestCase):
+    def seed(self, prefix, **options):
+        call_command('seed_data', users=30, posts=60, likes=200, follows=120, seed=7,
+                     prefix=prefix, stdout=StringIO(), **options)
+
+    def follow_graph(self, prefix):
+        return sorted(
+            Follow.objects.filter(follower__username__startswith=f'{prefix}_')
+            .values_list('follower__username', 'following__username')
+            .iterator()
+        )
+
+    def test_seed_creates_consistent_dataset(self):
+        """
+        Test that generated like counters match the generated Like rows.
+        """
+        self.seed('load', copy=False)
+
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertGreater(Like.objects.count(), 0)
+        self.assertFalse(Follow.objects.filter(follower=F('following')).exists())
+        real_counts = dict(Like.objects.values('post').annotate(n=Count('id')).values_list('post', 'n'))
+        for post_id, likes in Post.objects.values_list('id', 'likes'):
+            self.assertEqual(likes, real_counts.get(post_id, 0))
+
+    def test_seed_rejects_existing_prefix(self):
+        """
+        Test that seeding twice with the same prefix fails instead of colliding.
+        """
+        self.seed('load', copy=False)
+        with self.assertRaises(CommandError):
+            self.seed('load', copy=False)
+
+    @skipUnless(connection.vendor == 'postgresql', "COPY fast path requires PostgreSQL")
+    def test_seed_is_deterministic_across_insert_paths(self):
+        """
+        Test that the same seed produces the same follow graph with COPY and bulk_create.
+        """
+        self.seed('bulk', copy=False)
+        self.seed('copy', copy=True)
+
+        strip = lambda graph, prefix: [
+            (a.removeprefix(prefix), b.removeprefix(prefix)) for a, b in graph
+        ]
+        self.assertEqual(
+            strip(self.follow_graph('bulk'), 'bulk_'),
+            strip(self.follow_graph('copy'), 'copy_'),
+        )
+
+
+class BenchmarkCommandTests(TestCase):
+    def setUp(self):
+        call_command('seed_data', users=10, posts=30, likes=40, follows=20, stdout=StringIO())
+
+    def test_benchmark_writes_results_and_rolls_back(self):
+        """
+        Test that the benchmark reports every requested route and leaves no writes behind.
+        """
+        posts_before = Post.objects.count()
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command('benchmark', requests=3, warmup=1, routes='feed,feed_ranked,post_create,like',
+                         output=output.name, stdout=StringIO())
+            results = json.load(output)
+
+        self.assertEqual(set(results['routes']), {'feed', 'feed_ranked', 'feed_ranked_cold', 'post_create', 'like'})
+        for result in results['routes'].values():
+            self.assertEqual(result['requests'], 3)
+            self.assertEqual(result['errors'], 0)
+            self.assertGreater(result['queries_per_request'], 0)
+        self.assertEqual(Post.objects.count(), posts_before)
+
+    def test_benchmark_flags_regressions(self):
+        """
+        Test that a run slower than the stored baseline fails.
+        """
+        baseline = {'routes': {'feed': {'p95_ms': 0.0001, 'queries_per_request': 1}}}
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fp:
+            json.dump(baseline, fp)
+            fp.flush()
+            with self.assertRaisesMessage(CommandError, 'feed: p95'):
+                call_command('benchmark', requests=3, warmup=0, routes='feed',
+                             baseline=fp.name, stdout=StringIO())
+
+    def test_empty_routes_are_reported(self):
+        """
+        Test that a route with nothing to measure is reported with zero requests instead of failing.
+        """
+        Post.all_objects.all().delete()
+        out = StringIO()
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command('benchmark', requests=3, warmup=0, routes='likers', output=output.name, stdout=out)
+            results = json.load(output)
+        self.assertEqual(results['routes']['likers']['requests'], 0)
+        self.assertIn('no requests measured', out.getvalue())
+
+    def test_summary(self):
+        """
+        Test that samples are reduced to latency figures in milliseconds and queries per request.
+        """
+        summary = summarize([0.1, 0.1, 0.2, 0.1], [1, 1, 2, 1], 1)
+        self.assertEqual(summary, {
+            'requests': 4, 'errors': 1, 'p50_ms': 100.0, 'p95_ms': 185.0, 'p99_ms': 197.0,
+            'mean_ms': 125.0, 'queries_per_request': 1.25,
+        })
+        self.assertIsNone(summarize([], [], 0)['p95_ms'])
+
+
+class ProfilingMiddlewareTests(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.user = User.objects.create_user(username='user1', password='password123', email='user1@example.com')
+        Post.objects.create(author=self.user, content="Post by user1")
+
+    def profiling(self, **config):
+        return override_settings(PROFILING={
+            'ENABLED': True, 'SAMPLE_RATE': 0.0, 'HEADER': 'X-Profile',
+            'HEADER_TOKEN': 'secret', 'DIRECTORY': self.directory, 'MAX_FILES': 2, **config,
+        })
+
+    def test_profile_requested_by_header(self):
+        """
+        Test that a request with the profiling header writes a profile and its metadata.
+        """
+        with self.profiling():
+            self.client.force_authenticate(user=self.user)
+            response = self.client.get(reverse('feed'), HTTP_X_PROFILE='secret')
+
+        profile_id = response['X-Profile-Id']
+        self.assertTrue(os.path.exists(os.path.join(self.directory, f'{profile_id}.prof')))
+        with open(os.path.join(self.directory, f'{profile_id}.json')) as fp:
+            meta = json.load(fp)
+        self.assertEqual(meta['route'], 'api/v1/users/feed/')
+        self.assertEqual(meta['user'], 'user1')
+        self.assertGreater(meta['sql']['queries'], 0)
+
+    def test_overlapping_profiles(self):
+        """
+        Test that a request arriving while another one is profiled is served unprofiled.
+        """
+        self.client.force_authenticate(user=self.user)
+        with self.profiling():
+            with middleware._profiling:
+                response = self.client.get(reverse('feed'), HTTP_X_PROFILE='secret')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('X-Profile-Id', response)
+
+            response = self.client.get(reverse('feed'), HTTP_X_PROFILE='secret')
+            self.assertIn('X-Profile-Id', response)
+
+    def test_header_requires_token(self):
+        """
+        Test that the header is ignored when its value does not match the token.
+        """
+        with self.profiling():
+            self.client.force_authenticate(user=self.user)
+            response = self.client.get(reverse('feed'), HTTP_X_PROFILE='guess')
+
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_profiles_are_rotated(self):
+        """
+        Test that only the newest MAX_FILES profiles are kept.
+        """
+        with self.profiling(SAMPLE_RATE=1.0):
+            self.client.force_authenticate(user=self.user)
+            for _ in range(4):
+                self.client.get(reverse('feed'))
+
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.endswith('.prof')]), 2)
+        self.assertEqual(len(os.listdir(self.directory)), 4)
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user(username='user1', password='password123', email='user1@example.com')
+        self.client.force_authenticate(user=self.user)
+
+    def test_metrics_report_requests_and_queries_per_route(self):
+        """
+        Test that handled requests show up as per-route counters and histograms.
+        """
+        self.client.get(reverse('feed'))
+        response = self.client.get(reverse('metrics'))
+        body = response.content.decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('http_requests_total{route="api/v1/users/feed/",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{route="api/v1/users/feed/",method="GET"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{route="api/v1/users/feed/",method="GET",le="+Inf"} 1', body)
+        self.assertRegex(body, r'db_queries_total\{route="api/v1/users/feed/"\} [1-9]')
+
+    def test_cache_hits_and_misses(self):
+        """
+        Test that the instrumented cache backend counts hits and misses.
+        """
+        cache.set('metrics-test', 1)
+        cache.get('metrics-test')
+        cache.get_many(['metrics-test', 'metrics-missing'])
+        body = self.client.get(reverse('metrics')).content.decode()
+
+        self.assertIn('cache_requests_total{result="hit"} 2', body)
+        self.assertIn('cache_requests_total{result="miss"} 1', body)
+
+    def test_multiprocess_snapshots_are_merged(self):
+        """
+        Test that snapshots written by other worker processes are added up.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, '999999.json'), 'w') as fp:
+            json.dump({'counters': [['throttle_rejections_total', [['route', 'x/']], 2]], 'histograms': []}, fp)
+
+        with override_settings(METRICS={**settings.METRICS, 'MULTIPROCESS_DIR': directory}):
+            registry.inc('throttle_rejections_total', (('route', 'x/'),))
+            body = self.client.get(reverse('metrics')).content.decode()
+
+        self.assertIn('throttle_rejections_total{route="x/"} 3', body)
+        self.assertTrue(os.path.exists(os.path.join(directory, f'{os.getpid()}.json')))
+
+    def test_concurrent_flushes(self):
+        """
+        Test that threads flushing the same process snapshot at once do not fail.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        errors = []
+
+        def work():
+            try:
+                for _ in range(200):
+                    registry.inc('throttle_rejections_total', (('route', 'x/'),))
+                    registry.collect()
+            except Exception as error:
+                errors.append(error)
+
+        with override_settings(METRICS={**settings.METRICS, 'MULTIPROCESS_DIR': directory, 'FLUSH_INTERVAL': 0}):
+            threads = [threading.Thread(target=work) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(directory), [f'{os.getpid()}.json'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], REPLICA_STICKY_SECONDS=10)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.user = User(pk=1, username='user1')
+
+    @contextmanager
+    def request_as(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        token = begin_request(request)
+        try:
+            yield
+        finally:
+            end_request(token)
+
+    def test_reads_use_replica(self):
+        """
+        Test that reads go to a replica and writes to the primary.
+        """
+        with self.request_as(self.user):
+            self.assertEqual(self.router.db_for_read(Post), 'replica_0')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_reads_after_write_stick_to_primary(self):
+        """
+        Test that a user's reads stay on the primary after they write, in later requests too.
+        """
+        with self.request_as(self.user):
+            self.router.db_for_write(Post)
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+        with self.request_as(self.user):
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_other_users_keep_reading_from_replica(self):
+        """
+        Test that one user's write does not pin other users to the primary.
+        """
+        with self.request_as(self.user):
+            self.router.db_for_write(Post)
+
+        with self.request_as(User(pk=2, username='user2')):
+            self.assertEqual(self.router.db_for_read(Post), 'replica_0')
+
+    def test_pin_expires(self):
+        """
+        Test that reads return to the replica once the sticky window has passed.
+        """
+        with self.request_as(self.user):
+            self.router.db_for_write(Post)
+        cache.delete(pin_key(self.user.pk))
+
+        with self.request_as(self.user):
+            self.assertEqual(self.router.db_for_read(Post), 'replica_0')
+
+
+class ReplicaAliasMixin:
+    """
+    Adds a `replica_0` alias mirroring the test database, as settings do for
+    POSTGRES_REPLICA_HOSTS, backed by a second real connection. It is added
+    after the test case is set up, since the runner only knows the
+    configured aliases, and needs a TransactionTestCase so that connection
+    sees committed rows.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        primary = connections['default'].settings_dict
+        connections.settings['replica_0'] = {**primary, 'TEST': {**primary['TEST'], 'MIRROR': 'default'}}
+        cls.databases = {*cls.databases, 'replica_0'}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica_0'].close()
+        del connections['replica_0']
+        del connections.settings['replica_0']
+        super().tearDownClass()
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRoutingTests(ReplicaAliasMixin, TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user1 = User.objects.create_user(username='user1', email='user1@example.com', password='password123')
+        self.user2 = User.objects.create_user(username='user2', email='user2@example.com', password='password123')
+        Post.objects.create(author=self.user2, content='Hello')
+        Follow.objects.create(follower=self.user1, following=self.user2)
+        self.client = APIClient()
+
+    def feed_queries(self, user):
+        """
+        Return the post queries of a feed request sent to the primary and to the replica.
+        """
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica_0']) as replica:
+            response = self.client.get(reverse('feed'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [[query['sql'] for query in queries if '"api_post"' in query['sql']] for queries in (primary, replica)]
+
+    def test_reads_go_to_replica(self):
+        """
+        Test that the feed is read from the replica connection.
+        """
+        primary, replica = self.feed_queries(self.user1)
+        self.assertEqual(primary, [])
+        self.assertTrue(replica)
+
+    def test_reads_after_write_go_to_primary(self):
+        """
+        Test that after a user writes, their reads use the primary while other users stay on the replica.
+        """
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.post(reverse('create_post'), {'content': 'Mine'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        primary, replica = self.feed_queries(self.user1)
+        self.assertTrue(primary)
+        self.assertEqual(replica, [])
+
+        primary, replica = self.feed_queries(self.user2)
+        self.assertEqual(primary, [])
+        self.assertTrue(replica)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaInstrumentationTests(ReplicaAliasMixin, TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user1', password='password123', email='user1@example.com')
+        Post.objects.create(author=self.user, content="Post by user1")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_profiles_include_replica_queries(self):
+        """
+        Test that profiles record the SQL sent to read replicas.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with override_settings(PROFILING={
+            'ENABLED': True, 'SAMPLE_RATE': 1.0, 'HEADER': 'X-Profile', 'HEADER_TOKEN': None,
+            'DIRECTORY': directory, 'MAX_FILES': 2,
+        }), CaptureQueriesContext(connections['replica_0']) as replica:
+            response = self.client.get(reverse('feed'))
+
+        self.assertTrue(replica)
+        with open(os.path.join(directory, f"{response['X-Profile-Id']}.json")) as fp:
+            meta = json.load(fp)
+        self.assertTrue(any('"api_post"' in statement['sql'] for statement in meta['sql']['top']))
+
+
+    def test_metrics_count_replica_queries(self):
+        """
+        Test that per-route query metrics include the queries sent to read replicas.
+        """
+        registry.reset()
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica_0']) as replica:
+            self.client.get(reverse('feed'))
+        count = len(primary) + len(replica)
+
+        self.assertTrue(len(replica))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(f'db_queries_total{{route="api/v1/users/feed/"}} {count}', body)
+
+class OpenAPISchemaTests(TestCase):
+    def test_build_and_serve_schema_file(self):
+        """
+        Test that the built schema file is served as is at /swagger.json.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'openapi.json')
+        call_command('build_openapi_schema', output=path, stdout=StringIO())
+        with open(path) as fp:
+            schema = json.load(fp)
+        self.assertIn('/users/feed/', schema['paths'])
+
+        with override_settings(OPENAPI_SCHEMA_FILE=path):
+            response = self.client.get(reverse('openapi-schema'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), schema)
+
+    def test_schema_generated_when_file_missing(self):
+        """
+        Test that the schema is generated on demand when no file has been built.
+        """
+        with override_settings(OPENAPI_SCHEMA_FILE='/nonexistent/openapi.json'):
+            response = self.client.get(reverse('openapi-schema'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('/users/feed/', json.loads(response.content)['paths'])
+
+    def test_schema_file_built_after_a_miss_is_served(self):
+        """
+        Test that a schema file missing on one request is served once it has been built.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'openapi.json')
+        with override_settings(OPENAPI_SCHEMA_FILE=path):
+            response = self.client.get(reverse('openapi-schema'))
+            self.assertIn('/users/feed/', json.loads(response.content)['paths'])
+            with open(path, 'w') as fp:
+                json.dump({'swagger': '2.0', 'paths': {}}, fp)
+            response = self.client.get(reverse('openapi-schema'))
+        self.assertEqual(json.loads(response.content), {'swagger': '2.0', 'paths': {}})
+
+    def test_swagger_ui_points_at_schema_file(self):
+        """
+        Test that the Swagger UI loads the schema from /swagger.json.
+        """
+        response = self.client.get(reverse('schema-swagger-ui'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, '/swagger.json')
+
+
+class SoftDeleteTests(APITestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(username='user1', password='password123', email='user1@example.com')
+        self.user2 = User.objects.create_user(username='user2', password='password123', email='user2@example.com')
+        self.client.force_authenticate(user=self.user1)
+        Follow.objects.create(follower=self.user1, following=self.user2)
+        Follow.objects.create(follower=self.user2, following=self.user1)
+        self.post1 = Post.objects.create(author=self.user1, content="Post by user1", likes=1)
+        self.post2 = Post.objects.create(author=self.user2, content="Post by user2", likes=1)
+        Like.objects.create(user=self.user2, post=self.post1)
+        Like.objects.create(user=self.user1, post=self.post2)
+
+    def purge(self):
+        call_command('purge_deleted', batch_size=1, stdout=StringIO())
+
+    def test_deleted_post_is_hidden_then_purged(self):
+        """
+        Test that a deleted post leaves the feed immediately and is purged with its likes later.
+        """
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.delete(reverse('delete_post', kwargs={'post_id': self.post2.id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.client.force_authenticate(user=self.user1)
+
+        self.assertTrue(Post.all_objects.filter(id=self.post2.id).exists())
+        contents = [post['content'] for post in self.client.get(reverse('feed')).data['results']]
+        self.assertEqual(contents, ["Post by user1"])
+        self.assertEqual(
+            self.client.post(reverse('like-post', kwargs={'post_id': self.post2.id})).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+        self.purge()
+        self.assertFalse(Post.all_objects.filter(id=self.post2.id).exists())
+        self.assertFalse(Like.objects.filter(post_id=self.post2.id).exists())
+
+    def test_deleted_account_is_hidden_then_purged(self):
+        """
+        Test that a deleted account and its posts disappear immediately and are purged later.
+        """
+        response = self.client.delete(reverse('delete_account'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.client.force_authenticate(user=self.user2)
+        self.assertEqual(
+            self.client.get(reverse('user_info', kwargs={'user_identifier': 'user1'})).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        contents = [post['content'] for post in self.client.get(reverse('feed')).data['results']]
+        self.assertEqual(contents, ["Post by user2"])
+
+        self.purge()
+        self.assertFalse(User.objects.filter(id=self.user1.id).exists())
+        self.assertFalse(Post.all_objects.filter(author_id=self.user1.id).exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(Like.objects.count(), 0)
+        self.post2.refresh_from_db()
+        self.assertEqual(self.post2.likes, 0)
+
+
+    def test_post_lookups_do_not_join_authors(self):
+        """
+        Test that default post queries do not join auth_user while deactivated authors stay hidden.
+        """
+        self.assertNotIn('auth_user', str(Post.objects.filter(pk=self.post2.pk).query))
+        self.user2.is_active = False
+        self.user2.save()
+        self.assertEqual(post_cache.get_many([self.post2.pk]), {})
+        contents = [post['content'] for post in self.client.get(reverse('feed')).data['results']]
+        self.assertEqual(contents, ["Post by user1"])
+
+    def test_account_posts_are_uncached_in_batches(self):
+        """
+        Test that deleting an account drops its cached posts from a job that works in batches.
+        """
+        cache.clear()
+        posts = [self.post1] + [Post.objects.create(author=self.user1, content=f"Post {i}") for i in range(2)]
+        post_cache.get_many([post.pk for post in posts])
+        with self.assertNumQueries(2):
+            invalidate_author_posts(self.user1.pk, batch_size=2)
+        self.assertEqual(
+            [cache.get(post_cache.key(post.pk)) is None for post in posts], [True, True, False],
+        )
+        self.assertEqual(Job.objects.get().payload, {'author_id': self.user1.pk, 'after': posts[1].pk, 'batch_size': 2})
+
+        call_command('run_jobs', once=True, stdout=StringIO())
+        self.assertIsNone(cache.get(post_cache.key(posts[2].pk)))
+
+
+calls = []
+
+
+@job_handler('test.record')
+def record_job(value, fail=False):
+    calls.append(value)
+    if fail:
+        raise RuntimeError("boom")
+
+
+class JobQueueTests(APITestCase):
+    def setUp(self):
+        calls.clear()
+        self.user1 = User.objects.create_user(username='user1', password='password123', email='user1@example.com')
+        self.post = Post.objects.create(author=self.user1, content="Post by user1")
+
+    def work(self):
+        call_command('run_jobs', once=True, stdout=StringIO())
+
+    def test_job_is_enqueued_with_the_transaction(self):
+        """
+        Test that a job enqueued in a rolled back transaction never runs.
+        """
+        with transaction.atomic():
+            enqueue('test.record', {'value': 1})
+            transaction.set_rollback(True)
+        enqueue('test.record', {'value': 2})
+
+        self.work()
+        self.assertEqual(calls, [2])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_is_retried_with_backoff(self):
+        """
+        Test that a failing job is rescheduled, then marked failed when out of attempts.
+        """
+        enqueue('test.record', {'value': 1, 'fail': True}, max_attempts=2)
+        self.work()
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn("boom", job.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        self.work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(calls, [1, 1])
+
+    def test_stale_running_jobs_are_released(self):
+        """
+        Test that jobs locked by a dead worker go back to the queue.
+        """
+        enqueue('test.record', {'value': 1})
+        Job.objects.update(status=Job.Status.RUNNING, locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(release_stale(), 1)
+        self.work()
+        self.assertEqual(calls, [1])
+
+    @override_settings(JOB_QUEUE={**settings.JOB_QUEUE, 'DEFER_LIKE_COUNTS': True})
+    def test_deferred_like_counts(self):
+        """
+        Test that with DEFER_LIKE_COUNTS the counter is updated by the worker.
+        """
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.post(reverse('like-post', kwargs={'post_id': self.post.id}))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['likes'], 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes, 0)
+
+        self.work()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes, 1)
+
+    def test_image_orientation_is_applied_before_metadata_is_dropped(self):
+        """
+        Test that processing an image rotates it as its EXIF orientation says and strips the EXIF data.
+        """
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        image = Image.new('RGB', (40, 20), 'white')
+        image.paste((255, 0, 0), (0, 0, 20, 20))
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise to display.
+        upload = BytesIO()
+        image.save(upload, format='JPEG', exif=exif)
+
+        with override_settings(MEDIA_ROOT=media):
+            self.post.image.save('photo.jpg', ContentFile(upload.getvalue()))
+            enqueue('process_post_image', {'post_id': self.post.pk})
+            self.work()
+            with self.post.image.open('rb') as fp:
+                processed = Image.open(fp)
+                processed.load()
+
+        self.assertEqual(processed.size, (20, 40))
+        self.assertNotIn('exif', processed.info)
+        # The red half that was on the left is on top once rotated.
+        self.assertGreater(processed.getpixel((10, 5))[0], 200)
+        self.assertGreater(processed.getpixel((10, 35))[1], 200)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Partitioning requires PostgreSQL")
+class PartitioningTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user1', password='password123')
+        self.post = Post.objects.create(author=self.user, content='Old post')
+        Post.objects.filter(pk=self.post.pk).update(created_at=timezone.now() - timedelta(days=400))
+        Like.objects.create(user=self.user, post=self.post)
+        self.client.force_authenticate(user=self.user)
+
+    def test_partition_posts_command(self):
+        """
+        Test that existing rows move into the legacy partition and new rows keep working.
+        """
+        out = StringIO()
+        call_command('partition_posts', '--likes', stdout=out)
+
+        self.assertTrue(is_partitioned('api_post'))
+        self.assertTrue(is_partitioned('api_like'))
+        next_month = add_months(month_start(), 1)
+        self.assertEqual(partitions('api_post')['api_post_legacy'], next_month)
+        self.assertIn(f'api_post_p{add_months(month_start(), 3):%Y%m}', partitions('api_post'))
+        self.assertTrue(Job.objects.filter(name='maintain_partitions').exists())
+
+        response = self.client.post(reverse('create_post'), {'content': 'New post'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertGreater(response.data['id'], self.post.id)
+        response = self.client.post(reverse('like-post', kwargs={'post_id': response.data['id']}))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(reverse('feed'))
+        self.assertEqual([post['content'] for post in response.data['results']], ['New post', 'Old post'])
+
+        # Running it again only tops up future partitions.
+        call_command('partition_posts', '--likes', '--months-ahead', '4', stdout=out)
+        self.assertIn(f'api_post_p{add_months(month_start(), 4):%Y%m}', partitions('api_post'))
+
+    def test_rows_past_the_last_partition(self):
+        """
+        Test that rows past the created months go to the default partition and move out with their month.
+        """
+        call_command('partition_posts', '--months-ahead', '1', stdout=StringIO())
+        post = Post.objects.create(author=self.user, content='Future post')
+        Post.objects.filter(pk=post.pk).update(created_at=timezone.now() + timedelta(days=130))
+
+        def partition_of(post):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT tableoid::regclass::text FROM api_post WHERE id = %s', [post.pk])
+                return cursor.fetchone()[0]
+
+        self.assertEqual(partition_of(post), 'api_post_default')
+        created = ensure_partitions(Post, months_ahead=5)
+        self.assertNotIn('api_post_default', created)
+        self.assertEqual(partition_of(post), f'api_post_p{month_start(timezone.now() + timedelta(days=130)):%Y%m}')
+        self.assertEqual(Post.objects.get(pk=post.pk).content, 'Future post')
+
+    @override_settings(POSTS_FEED_WINDOW_DAYS=30)
+    def test_feed_window(self):
+        """
+        Test that posts older than POSTS_FEED_WINDOW_DAYS are left out of the feed.
+        """
+        Post.objects.create(author=self.user, content='New post')
+        response = self.client.get(reverse('feed'))
+        self.assertEqual([post['content'] for post in response.data['results']], ['New post'])
+
+    def test_archive_partitions(self):
+        """
+        Test that archived partitions leave the model but remain in the archive schema.
+        """
+        call_command('partition_posts', stdout=StringIO())
+        archived = archive_partitions(Post, add_months(month_start(), 1))
+
+        self.assertEqual(archived, ['api_post_legacy'])
+        self.assertFalse(Post.all_objects.exists())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT content FROM {ARCHIVE_SCHEMA}.api_post_legacy')
+            self.assertEqual(cursor.fetchall(), [('Old post',)])
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(username='user1', email='user1@example.com', password='password123')
+        self.user2 = User.objects.create_user(username='user2', email='user2@example.com', password='password123')
+        Follow.objects.create(follower=self.user1, following=self.user2)
+        for i in range(3):
+            Post.objects.create(author=self.user2, content=f'Post {i}')
+        self.client.force_authenticate(user=self.user1)
+
+    def post_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [query['sql'] for query in queries if 'FROM "api_post"' in query['sql']
+                          and 'COUNT(' not in query['sql']]
+
+    def test_fields_trim_output_and_columns(self):
+        """
+        Test that ?fields= limits the response and the selected columns and skips the author join.
+        """
+        response, queries = self.post_queries(reverse('feed') + '?fields=id,content')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'content'})
+        self.assertEqual(len(queries), 1)
+        select = queries[0].split(' FROM ')[0]
+        self.assertNotIn('"api_post"."image"', select)
+        self.assertNotIn('"auth_user"', select)
+        # The followed accounts subquery joins auth_user on its own alias.
+        self.assertNotIn('JOIN "auth_user" ON ("api_post"."author_id"', queries[0])
+
+        _, queries = self.post_queries(reverse('feed') + '?fields=id,author')
+        self.assertIn('JOIN "auth_user" ON ("api_post"."author_id"', queries[0])
+
+    def test_author_is_joined_once(self):
+        """
+        Test that requesting the author loads it in the same query instead of once per post.
+        """
+        response, queries = self.post_queries(reverse('feed') + '?fields=author,likes')
+        self.assertEqual(set(response.data['results'][0]), {'author', 'likes'})
+        self.assertEqual(response.data['results'][0]['author'], 'user2')
+        self.assertEqual(len(queries), 1)
+        select = queries[0].split(' FROM ')[0]
+        self.assertIn('"auth_user"."username"', select)
+        self.assertNotIn('"auth_user"."email"', select)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('retrieve_posts', kwargs={'user_identifier': 'user2'}))
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_exclude_on_detail_endpoint(self):
+        """
+        Test that ?exclude= removes fields from a single user response and its query.
+        """
+        url = reverse('user_info', kwargs={'user_identifier': 'user2'})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url + '?exclude=email,date_joined')
+        self.assertEqual(response.data, {'id': self.user2.id, 'username': 'user2'})
+        self.assertFalse(any('"auth_user"."email"' in query['sql'] for query in queries))
+
+    def test_unknown_field(self):
+        """
+        Test that asking for an unknown field is a validation error.
+        """
+        response = self.client.get(reverse('feed') + '?fields=id,password')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+
+
+class EncodingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user1', password='password123')
+        for i in range(10):
+            Post.objects.create(author=self.user, content=f'Post number {i} ' * 10)
+        self.client.force_authenticate(user=self.user)
+
+    def test_json_matches_standard_encoder(self):
+        """
+        Test that the orjson renderer produces the same document as DRF's JSON renderer.
+        """
+        response = self.client.get(reverse('feed'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), json.loads(json.dumps(response.data)))
+
+    def test_messagepack_response_and_request(self):
+        """
+        Test that MessagePack is negotiated through Accept and parsed from request bodies.
+        """
+        response = self.client.get(reverse('feed'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(response.content)
+        self.assertEqual(data['count'], 10)
+        self.assertEqual(data['results'][0]['created_at'], response.data['results'][0]['created_at'])
+
+        response = self.client.post(
+            reverse('create_post'), msgpack.packb({'content': 'Packed'}), content_type='application/msgpack',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Post.objects.filter(content='Packed').exists())
+
+        response = self.client.post(reverse('create_post'), b'\xc1', content_type='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_gzip_compression(self):
+        """
+        Test that large responses are gzipped for clients that accept it.
+        """
+        response = self.client.get(reverse('feed'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content))['count'], 10)
+
+        response = self.client.get(reverse('feed'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @skipUnless(brotli is not None, "brotli is not installed")
+    def test_brotli_preferred(self):
+        """
+        Test that brotli is used when accepted, unless refused with q=0.
+        """
+        response = self.client.get(reverse('feed'), HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(brotli.decompress(response.content))['count'], 10)
+
+        response = self.client.get(reverse('feed'), HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_small_responses_are_not_compressed(self):
+        """
+        Test that responses under COMPRESSION['MIN_SIZE'] are sent uncompressed.
+        """
+        response = self.client.get(reverse('feed') + '?fields=id', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_bench_encoding_command(self):
+        """
+        Test that the encoding benchmark reports every format.
+        """
+        out = StringIO()
+        call_command('bench_encoding', iterations=2, stdout=out)
+        for name in ('json', 'orjson', 'msgpack', 'gzip'):
+            self.assertIn(name, out.getvalue())
+
+
+class FeedStreamTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user1 = User.objects.create_user(username='user1', password='password123')
+        self.user2 = User.objects.create_user(username='user2', password='password123')
+        Follow.objects.create(follower=self.user2, following=self.user1)
+        self.post = Post.objects.create(author=self.user1, content='First post')
+
+    def act_as(self, user, method, url):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(url, {'content': 'Streamed post'}, format='json')
+
+    async def test_requires_token(self):
+        """
+        Test that the stream rejects requests without a valid access token.
+        """
+        response = await self.async_client.get(reverse('feed_stream'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(reverse('feed_stream'), {'token': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_deactivated_account_is_rejected(self):
+        """
+        Test that a still valid token of a deactivated account gets 401.
+        """
+        token = str(AccessToken.for_user(self.user2))
+        await User.objects.filter(pk=self.user2.pk).aupdate(is_active=False)
+        response = await self.async_client.get(reverse('feed_stream'), {'token': token})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_followers_receive_posts_and_likes(self):
+        """
+        Test that followers receive new posts and like counts as they happen.
+        """
+        response = await self.async_client.get(
+            reverse('feed_stream'), {'token': str(AccessToken.for_user(self.user2))},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+
+        await sync_to_async(self.act_as)(self.user1, 'post', reverse('create_post'))
+        event = await asyncio.wait_for(anext(stream), 5)
+        self.assertTrue(event.startswith(b'event: post\n'))
+        self.assertIn(b'"content":"Streamed post"', event)
+
+        await sync_to_async(self.act_as)(self.user2, 'post', reverse('like-post', kwargs={'post_id': self.post.id}))
+        event = await asyncio.wait_for(anext(stream), 5)
+        self.assertEqual(event, f'event: likes\ndata: {{"post_id":{self.post.id},"likes":1}}\n\n'.encode())
+
+        # The ASGI handler cancels the stream when the client disconnects.
+        self.assertIn(author_channel(self.user1.id), get_broker().channels)
+        reader = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        reader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reader
+        self.assertNotIn(author_channel(self.user1.id), get_broker().channels)
+
+    def test_broker_errors_do_not_fail_writes(self):
+        """
+        Test that a failing broker is logged and the committed post is still created.
+        """
+        with patch.object(InProcessBroker, 'publish', side_effect=RuntimeError("broker down")), \
+                self.assertLogs(level='ERROR'):
+            response = self.act_as(self.user1, 'post', reverse('create_post'))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Post.objects.filter(content='Streamed post').exists())
+
+
+class EventBrokerTests(SimpleTestCase):
+    @override_settings(EVENTS={**settings.EVENTS, 'QUEUE_SIZE': 2})
+    def test_slow_subscriber_overflows(self):
+        """
+        Test that a subscriber that falls behind is flagged instead of buffering without limit.
+        """
+        async def run():
+            broker = InProcessBroker()
+            subscription = broker.subscribe(['channel'])
+            for i in range(3):
+                broker.publish('channel', i)
+            await asyncio.sleep(0)
+            received = [await subscription.get(1), await subscription.get(1)]
+            broker.unsubscribe(subscription)
+            return received, subscription.overflowed, broker.channels
+
+        received, overflowed, channels = asyncio.run(run())
+        self.assertEqual(received, [1, None])
+        self.assertTrue(overflowed)
+        self.assertEqual(channels, {})
+
+    def test_heartbeat_timeout(self):
+        """
+        Test that waiting on an idle subscription times out so a heartbeat can be sent.
+        """
+        async def run():
+            subscription = InProcessBroker().subscribe(['channel'])
+            with self.assertRaises(asyncio.TimeoutError):
+                await subscription.get(0.01)
+
+        asyncio.run(run())
+
+
+@skipUnless(connection.vendor == 'postgresql', "LISTEN/NOTIFY requires PostgreSQL")
+class PostgresBrokerTests(TransactionTestCase):
+    def test_events_cross_connections(self):
+        """
+        Test that events published on one connection reach subscribers through the listener.
+        """
+        broker = PostgresBroker()
+        received = []
+        subscribed = threading.Event()
+
+        async def consume():
+            subscription = broker.subscribe(['channel'])
+            subscribed.set()
+            received.append(await subscription.get(5))
+
+        consumer = threading.Thread(target=asyncio.run, args=(consume(),))
+        consumer.start()
+        try:
+            self.assertTrue(subscribed.wait(5) and broker.listening.wait(5))
+            broker.publish('channel', {'type': 'post', 'post_id': 1})
+            consumer.join(5)
+            self.assertEqual(received, [{'type': 'post', 'post_id': 1}])
+        finally:
+            broker.stop()
+
+    def test_large_posts_are_published(self):
+        """
+        Test that posts longer than the 8000 byte NOTIFY limit are published by id.
+        """
+        user = User.objects.create_user(username='user1', password='password123')
+        broker = PostgresBroker()
+        received = []
+        subscribed = threading.Event()
+
+        async def consume():
+            subscription = broker.subscribe([author_channel(user.pk)])
+            subscribed.set()
+            received.append(await subscription.get(5))
+
+        consumer = threading.Thread(target=asyncio.run, args=(consume(),))
+        consumer.start()
+        try:
+            self.assertTrue(subscribed.wait(5) and broker.listening.wait(5))
+            with patch('api.events.get_broker', return_value=broker):
+                response = self.client.post(
+                    reverse('create_post'), {'content': 'x' * 9000}, content_type='application/json',
+                    HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}',
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            consumer.join(5)
+            self.assertEqual(received, [{'type': 'post', 'post_id': response.json()['id']}])
+        finally:
+            broker.stop()
+
+
+class FeedDeltaTests(APITestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(username='user1', password='password123')
+        self.user2 = User.objects.create_user(username='user2', password='password123')
+        self.user3 = User.objects.create_user(username='user3', password='password123')
+        Follow.objects.create(follower=self.user1, following=self.user2)
+        self.seen = Post.objects.create(author=self.user2, content='Seen post')
+        self.client.force_authenticate(user=self.user1)
+        self.url = reverse('feed_delta')
+
+    def test_nothing_new(self):
+        """
+        Test that the delta answers 204 without a body when the feed has not changed.
+        """
+        Post.objects.create(author=self.user3, content='Not followed')
+        response = self.client.get(self.url, {'since_id': self.seen.id})
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response.content, b'')
+
+    def test_new_posts(self):
+        """
+        Test that only newer posts from followed and own accounts are returned, newest first.
+        """
+        Post.objects.create(author=self.user1, content='Own post')
+        Post.objects.create(author=self.user2, content='New post')
+        Post.objects.create(author=self.user2, content='Deleted post', deleted_at=timezone.now())
+
+        response = self.client.get(self.url, {'since_id': self.seen.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([post['content'] for post in response.data['results']], ['New post', 'Own post'])
+
+        response = self.client.get(self.url, {'since_id': self.seen.id, 'count_only': 'true'})
+        self.assertEqual(response.data, {'count': 2})
+
+        self.user2.is_active = False
+        self.user2.save()
+        response = self.client.get(self.url, {'since_id': self.seen.id, 'count_only': 'true'})
+        self.assertEqual(response.data, {'count': 1})
+
+    def test_since_timestamp(self):
+        """
+        Test that a timestamp can be used instead of a post id.
+        """
+        Post.objects.create(author=self.user2, content='New post')
+        response = self.client.get(self.url, {'since': self.seen.created_at.isoformat(), 'fields': 'content'})
+        self.assertEqual(response.data['results'], [{'content': 'New post'}])
+
+    def test_naive_timestamp(self):
+        """
+        Test that a timestamp without offset is read in the current time zone.
+        """
+        Post.objects.create(author=self.user2, content='New post')
+        since = timezone.make_naive(self.seen.created_at).isoformat()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            response = self.client.get(self.url, {'since': since, 'fields': 'content'})
+        self.assertEqual(response.data['results'], [{'content': 'New post'}])
+
+    def test_invalid_parameters(self):
+        """
+        Test that a missing or malformed cursor is a validation error.
+        """
+        for params in ({}, {'since_id': 'abc'}, {'since': 'yesterday'}, {'since': '2024-13-45T00:00:00'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == 'postgresql', "Index-only scans are PostgreSQL specific")
+    def test_count_uses_index_only_scan(self):
+        """
+        Test that counting new posts only reads the partial author/id index.
+        """
+        with connection.cursor() as cursor:
+            # Rules out the equally cheap plans on a table this small.
+            for setting in ('enable_seqscan', 'enable_indexscan', 'enable_bitmapscan'):
+                cursor.execute(f"SET LOCAL {setting} = off")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'since_id': self.seen.id, 'count_only': 'true'})
+        sql = queries.captured_queries[-1]['sql']
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}")
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('Index Only Scan using post_visible_author_id_idx', plan)
+
+
+class LikersTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader', password='password123')
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.likers = [User.objects.create_user(username=f'liker{i}', password='password123') for i in range(5)]
+        Follow.objects.create(follower=self.reader, following=self.author)
+        for liker in self.likers[:3]:
+            Follow.objects.create(follower=self.reader, following=liker)
+        self.post = Post.objects.create(author=self.author, content='Popular post')
+        self.other = Post.objects.create(author=self.author, content='Quiet post')
+        for liker in self.likers:
+            Like.objects.create(user=liker, post=self.post)
+        Like.objects.create(user=self.likers[3], post=self.other)
+        self.client.force_authenticate(user=self.reader)
+
+    @patch.object(LikersPagination, 'page_size', 2)
+    def test_likers_keyset_pagination(self):
+        """
+        Test that likers are listed newest first across cursor pages.
+        """
+        url = reverse('post_likers', kwargs={'post_id': self.post.id})
+        usernames = []
+        while url:
+            # The post is looked up on the first page and cached after that.
+            with self.assertNumQueries(1 if usernames else 2):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            usernames += [liker['username'] for liker in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(usernames, [f'liker{i}' for i in reversed(range(5))])
+        self.assertEqual(set(response.data['results'][0]), {'id', 'username', 'liked_at'})
+
+    @patch.object(LikersPagination, 'page_size', 2)
+    def test_likers_sparse_fields_keep_the_cursor_column(self):
+        """
+        Test that ?fields= without liked_at still loads the ordering column instead of a query per row.
+        """
+        url = reverse('post_likers', kwargs={'post_id': self.post.id}) + '?fields=username'
+        usernames = []
+        while url:
+            with self.assertNumQueries(1 if usernames else 2):
+                response = self.client.get(url)
+            usernames += [liker['username'] for liker in response.data['results']]
+            self.assertEqual(set(response.data['results'][0]), {'username'})
+            url = response.data['next']
+        self.assertEqual(usernames, [f'liker{i}' for i in reversed(range(5))])
+
+    def test_likers_hide_inactive_users_and_missing_posts(self):
+        """
+        Test that deactivated likers are hidden and unknown posts return 404.
+        """
+        self.likers[0].is_active = False
+        self.likers[0].save()
+        response = self.client.get(reverse('post_likers', kwargs={'post_id': self.post.id}), {'fields': 'username'})
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertNotIn({'username': 'liker0'}, response.data['results'])
+
+        response = self.client.get(reverse('post_likers', kwargs={'post_id': 9999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_feed_liked_by_following(self):
+        """
+        Test that feed items count the likes from followed accounts with one extra query per page.
+        """
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('feed'))
+        counts = {post['content']: post['liked_by_following'] for post in response.data['results']}
+        self.assertEqual(counts, {'Popular post': 3, 'Quiet post': 0})
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('feed'), {'exclude': 'liked_by_following'})
+        self.assertNotIn('liked_by_following', response.data['results'][0])
+
+
+class PasswordHashingTests(APITestCase):
+    def hashing(self, **overrides):
+        return override_settings(PASSWORD_HASHING={**settings.PASSWORD_HASHING, **overrides})
+
+    def test_hashes_match_django_pbkdf2(self):
+        """
+        Test that pooled and inline hashes are identical to Django's PBKDF2 hasher.
+        """
+        expected = DjangoPBKDF2PasswordHasher().encode('password123', 'somesalt', 1000)
+        for processes in (0, 1):
+            with self.hashing(PROCESSES=processes):
+                self.assertEqual(PooledPBKDF2PasswordHasher().encode('password123', 'somesalt', 1000), expected)
+
+    def test_rehash_on_login(self):
+        """
+        Test that logging in rehashes a password stored with outdated iterations.
+        """
+        with self.hashing(ITERATIONS=1000):
+            user = User.objects.create_user(username='user1', password='password123')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with self.hashing(ITERATIONS=2000):
+            response = self.client.post(
+                reverse('token_obtain_pair'), {'username': 'user1', 'password': 'password123'}, format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_saturated_pool_rejects(self):
+        """
+        Test that logins and registrations are rejected with 503 while the pool is full.
+        """
+        with self.hashing(ITERATIONS=1000):
+            User.objects.create_user(username='user1', password='password123')
+        with self.hashing(PROCESSES=1, MAX_PENDING=0):
+            response = self.client.post(
+                reverse('token_obtain_pair'), {'username': 'user1', 'password': 'password123'}, format='json',
+            )
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response['Retry-After'], '1')
+
+            response = self.client.post(reverse('register'), {
+                'username': 'user2', 'email': 'user2@example.com', 'password': 'password123',
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+            # Outside the API, e.g. createsuperuser, it is a plain exception.
+            with self.assertRaises(HashingUnavailable) as raised:
+                User.objects.create_user(username='user3', password='password123')
+            self.assertNotIsInstance(raised.exception, APIException)
+        self.assertFalse(User.objects.filter(username__in=['user2', 'user3']).exists())
+
+    def test_bench_login_command(self):
+        """
+        Test that the mixed load benchmark reports a row per pool size.
+        """
+        with self.hashing(ITERATIONS=1000):
+            User.objects.create_user(username='user1', password='password123')
+            out = StringIO()
+            call_command('bench_login', processes='0', duration=0.2, login_threads=1, feed_threads=1, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+class PostCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user1 = User.objects.create_user(username='user1', password='password123')
+        self.user2 = User.objects.create_user(username='user2', password='password123')
+        self.posts = [Post.objects.create(author=self.user1, content=f'Post {i}') for i in range(3)]
+        self.client.force_authenticate(user=self.user2)
+
+    def batch(self, *ids):
+        return self.client.get(reverse('post_batch'), {'ids': ','.join(str(post_id) for post_id in ids)})
+
+    def test_batch_fills_misses_with_one_query(self):
+        """
+        Test that a batch loads every missing post in one query and then comes from the cache.
+        """
+        deleted = Post.objects.create(author=self.user1, content='Deleted', deleted_at=timezone.now())
+        ids = [self.posts[2].id, 9999, self.posts[0].id, deleted.id, self.posts[2].id]
+        with self.assertNumQueries(1):
+            response = self.batch(*ids)
+        self.assertEqual([post['content'] for post in response.data['results']], ['Post 2', 'Post 0'])
+        self.assertEqual(response.data['results'][0]['author'], 'user1')
+        self.assertEqual(response.data['missing'], [9999, deleted.id])
+
+        with self.assertNumQueries(1):
+            self.batch(self.posts[0].id, self.posts[1].id)
+        with self.assertNumQueries(0):
+            response = self.batch(*[post.id for post in self.posts])
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_batch_validation(self):
+        """
+        Test that missing, malformed or too many ids are rejected.
+        """
+        for ids in ('', 'a,b', ','.join(str(i) for i in range(101))):
+            response = self.client.get(reverse('post_batch'), {'ids': ids})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalidation(self):
+        """
+        Test that likes, edits, deletes and account deletion invalidate cached posts.
+        """
+        post = self.posts[0]
+        self.batch(post.id)
+
+        self.client.post(reverse('like-post', kwargs={'post_id': post.id}))
+        self.assertEqual(self.batch(post.id).data['results'][0]['likes'], 1)
+
+        self.client.force_authenticate(user=self.user1)
+        self.client.patch(reverse('update_post', kwargs={'post_id': post.id}), {'content': 'Edited'}, format='json')
+        self.assertEqual(self.batch(post.id).data['results'][0]['content'], 'Edited')
+        post.refresh_from_db()
+        self.assertEqual(post.likes, 1)
+
+        self.client.delete(reverse('delete_post', kwargs={'post_id': post.id}))
+        self.assertEqual(self.batch(post.id).data['missing'], [post.id])
+
+        self.batch(self.posts[1].id)
+        self.client.delete(reverse('delete_account'))
+        self.client.force_authenticate(user=self.user2)
+        # Hidden right away, the job only removes the entries later.
+        self.assertEqual(self.batch(self.posts[1].id).data['missing'], [self.posts[1].id])
+        call_command('run_jobs', once=True, stdout=StringIO())
+        self.assertIsNone(cache.get(post_cache.key(self.posts[1].id)))
+        self.assertEqual(self.batch(self.posts[1].id).data['missing'], [self.posts[1].id])
+
+    def test_like_view_uses_cache(self):
+        """
+        Test that liking a cached post does not look it up in the database again.
+        """
+        post = self.posts[0]
+        self.batch(post.id)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('like-post', kwargs={'post_id': post.id}))
+        self.assertFalse(any('"api_post"."content"' in query['sql'] for query in queries))
+
+
+class LoaderTests(APITestCase):
+    def setUp(self):
+        self.authors = [
+            User.objects.create_user(username=f'author{i}', email=f'author{i}@example.com', password='password123')
+            for i in range(3)
+        ]
+        for i in range(6):
+            Post.objects.create(author=self.authors[i % 3], content=f'Post {i}')
+        self.user = self.authors[0]
+        self.client.force_authenticate(user=self.user)
+
+    def test_loader_batches_and_memoizes(self):
+        """
+        Test that queued keys are fetched in one call with the next load and then memoized.
+        """
+        calls = []
+
+        def fetch(keys):
+            calls.append(sorted(keys))
+            return {key: key * 10 for key in keys if key != 3}
+
+        loader = Loader(fetch)
+        loader.queue([1, 2, 3])
+        self.assertEqual(loader.load(4), 40)
+        self.assertEqual(loader.load_many([1, 2, 3]), {1: 10, 2: 20})
+        self.assertIsNone(loader.load(3))
+        self.assertEqual(calls, [[1, 2, 3, 4]])
+
+    def test_serializer_loads_authors_in_one_query(self):
+        """
+        Test that serializing posts without their authors joined loads every author with a single query.
+        """
+        request = Request(RequestFactory().get('/'))
+        with self.assertNumQueries(2):
+            data = PostSerializer(Post.objects.order_by('id'), many=True, context={'request': request}).data
+        self.assertEqual([post['author'] for post in data], ['author0', 'author1', 'author2'] * 2)
+
+    def test_own_account_is_not_looked_up(self):
+        """
+        Test that views addressing the authenticated user reuse it instead of querying for it.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('check_following_status', kwargs={'user_identifier': 'author0'}))
+        self.assertEqual(response.data['user_id'], self.user.id)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('retrieve_posts', kwargs={'user_identifier': self.user.id}))
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_unknown_and_inactive_users(self):
+        """
+        Test that loaders treat unknown and deactivated users as missing.
+        """
+        self.authors[1].is_active = False
+        self.authors[1].save()
+        for identifier in ('author1', self.authors[1].id, 'nobody', 9999):
+            response = self.client.get(reverse('retrieve_posts', kwargs={'user_identifier': identifier}))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(reverse('follow_user', kwargs={'username': 'author1'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_through_cached_posts_keep_newer_columns(self):
+        """
+        Test that editing or deleting a post loaded from the cache does not overwrite likes or deleted_at set since.
+        """
+        cache.clear()
+        post = Post.objects.filter(author=self.user).first()
+        post_cache.get(post.pk)
+        # Changed behind the cached copy, which is left stale on purpose.
+        Post.all_objects.filter(pk=post.pk).update(likes=7, deleted_at=timezone.now())
+
+        response = self.client.patch(
+            reverse('update_post', kwargs={'post_id': post.pk}), {'content': 'Edited'}, format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        post = Post.all_objects.get(pk=post.pk)
+        self.assertEqual((post.content, post.likes), ('Edited', 7))
+        self.assertIsNotNone(post.deleted_at)
+
+        other = Post.objects.filter(author=self.user).exclude(pk=post.pk).first()
+        post_cache.get(other.pk)
+        Post.all_objects.filter(pk=other.pk).update(likes=3)
+        response = self.client.delete(reverse('delete_post', kwargs={'post_id': other.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        other = Post.all_objects.get(pk=other.pk)
+        self.assertEqual(other.likes, 3)
+        self.assertIsNotNone(other.deleted_at)
+
+
+class RankedFeedTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', email='reader@example.com', password='password123')
+        self.favourite = User.objects.create_user(username='favourite', email='fav@example.com', password='password123')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='password123')
+        for author in (self.favourite, self.other):
+            Follow.objects.create(follower=self.user, following=author)
+        now = timezone.now()
+        self.old_favourite = self.post(self.favourite, 'Favourite post', now - timedelta(hours=6))
+        self.new_other = self.post(self.other, 'Other post', now - timedelta(hours=1))
+        self.popular = self.post(self.other, 'Popular post', now - timedelta(hours=3), likes=50)
+        self.stale = self.post(self.other, 'Stale post', now - timedelta(days=30))
+        for i in range(3):
+            liked = self.post(self.favourite, f'Liked {i}', now - timedelta(days=2))
+            Like.objects.create(user=self.user, post=liked)
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, author, content, created_at, likes=0):
+        post = Post.objects.create(author=author, content=content, likes=likes)
+        Post.objects.filter(pk=post.pk).update(created_at=created_at)
+        return post
+
+    def ranked(self, **params):
+        response = self.client.get(reverse('feed'), {'mode': 'ranked', **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_score_features(self):
+        """
+        Test that scores fall with age and rise with like velocity and author affinity.
+        """
+        scores = score(np.array([1.0, 24.0, 24.0, 24.0]), np.array([0, 0, 100, 0]), np.array([0, 0, 0, 5]))
+        self.assertGreater(scores[0], scores[1])
+        self.assertGreater(scores[2], scores[1])
+        self.assertGreater(scores[3], scores[1])
+
+    def test_ranked_order(self):
+        """
+        Test that popular posts and posts of favourite authors outrank newer ones and old posts are left out.
+        """
+        contents = [post['content'] for post in self.ranked().data['results']]
+        self.assertEqual(contents[:3], ['Popular post', 'Favourite post', 'Other post'])
+        self.assertNotIn('Stale post', contents)
+
+        latest = self.client.get(reverse('feed')).data['results']
+        self.assertEqual(latest[0]['content'], 'Other post')
+
+    def test_ranking_is_cached_and_paginated(self):
+        """
+        Test that later pages are read from the cached ranking without scoring again.
+        """
+        with patch.object(PageNumberPagination, 'page_size', 2):
+            with CaptureQueriesContext(connection) as queries:
+                first = self.ranked()
+            self.assertTrue(any('"api_follow"' in query['sql'] and 'LIMIT 500' in query['sql']
+                                for query in queries))
+            Post.objects.create(author=self.other, content='Too late')
+            pages = [first]
+            while pages[-1].data['next']:
+                with CaptureQueriesContext(connection) as queries:
+                    pages.append(self.ranked(page=len(pages) + 1))
+                self.assertFalse(any('LIMIT 500' in query['sql'] for query in queries))
+        contents = [post['content'] for page in pages for post in page.data['results']]
+        self.assertEqual(first.data['count'], 6)
+        self.assertEqual(len(contents), 6)
+        self.assertNotIn('Too late', contents)
+
+        cache.delete(ranking_cache_key(self.user.pk))
+        self.assertEqual(self.ranked().data['count'], 7)
+
+    def test_deleted_posts_are_skipped(self):
+        """
+        Test that posts deleted after the ranking was cached are left out of their page.
+        """
+        self.ranked()
+        self.client.force_authenticate(user=self.other)
+        self.client.delete(reverse('delete_post', kwargs={'post_id': self.popular.id}))
+        self.client.force_authenticate(user=self.user)
+        contents = [post['content'] for post in self.ranked().data['results']]
+        self.assertNotIn('Popular post', contents)
+        self.assertEqual(contents[0], 'Favourite post')
+
+    def test_candidates_are_bounded(self):
+        """
+        Test that only the newest CANDIDATES posts are ranked.
+        """
+        with override_settings(FEED_RANKING={**settings.FEED_RANKING, 'CANDIDATES': 2}):
+            response = self.ranked()
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual({post['content'] for post in response.data['results']}, {'Other post', 'Popular post'})
+
+    def test_unknown_mode(self):
+        """
+        Test that an unknown feed mode is a validation error.
+        """
+        response = self.client.get(reverse('feed'), {'mode': 'random'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_numpy_is_loaded_on_first_ranking(self):
+        """
+        Test that loading the URLconf does not import numpy.
+        """
+        code = (
+            "import importlib, sys, django; from django.conf import settings; django.setup(); "
+            "importlib.import_module(settings.ROOT_URLCONF); print('numpy' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE},
+        )
+        self.assertEqual(result.stdout.strip(), 'False')
+
+
+class ReconcileLikesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='password123')
+        self.likers = [
+            User.objects.create_user(username=f'liker{i}', email=f'liker{i}@example.com', password='password123')
+            for i in range(3)
+        ]
+        self.posts = [Post.objects.create(author=self.author, content=f'Post {i}') for i in range(5)]
+        for i, post in enumerate(self.posts):
+            for liker in self.likers[:i % 4]:
+                Like.objects.create(user=liker, post=post)
+            Post.all_objects.filter(pk=post.pk).update(likes=i % 4)
+
+    def reconcile(self, **options):
+        out = StringIO()
+        call_command('reconcile_likes', stdout=out, **options)
+        return out.getvalue()
+
+    def likes(self):
+        return list(Post.all_objects.order_by('pk').values_list('likes', flat=True))
+
+    def test_full_run_corrects_drift_in_chunks(self):
+        """
+        Test that drifted counters are corrected with one grouped count per chunk and reported.
+        """
+        Post.all_objects.filter(pk=self.posts[1].pk).update(likes=4)
+        Post.all_objects.filter(pk=self.posts[2].pk).update(likes=0)
+        post_cache.get_many([self.posts[1].pk])
+        with CaptureQueriesContext(connection) as queries:
+            output = self.reconcile(chunk_size=2)
+        self.assertIn("Checked 5 posts: 2 drifted (total 5, net -1, max 3)", output)
+        self.assertEqual(self.likes(), [0, 1, 2, 3, 0])
+        counts = [query for query in queries if 'COUNT(' in query['sql'] and '"api_like"' in query['sql']]
+        self.assertEqual(len(counts), 3)
+        self.assertEqual(post_cache.get_many([self.posts[1].pk])[self.posts[1].pk].likes, 1)
+
+        self.assertIn("0 drifted", self.reconcile(full=True))
+
+    def test_incremental_run_checks_touched_posts(self):
+        """
+        Test that later runs only check posts whose counter changed or that got likes since the last run.
+        """
+        self.reconcile()
+        self.assertTrue(Checkpoint.objects.filter(name='reconcile_likes').exists())
+        Checkpoint.objects.update(position=timezone.now())
+
+        # A lost counter update on an old post goes unnoticed until a full run.
+        Post.all_objects.filter(pk=self.posts[0].pk).update(likes=7)
+        # Likes whose counter update never happened are found through the like.
+        Like.objects.create(user=self.likers[0], post=self.posts[4])
+        # Counters changed by the like endpoints are checked again.
+        Post.all_objects.filter(pk=self.posts[2].pk).update(likes=5, likes_updated_at=timezone.now())
+
+        output = self.reconcile(overlap=0)
+        self.assertIn("Checked 2 posts touched since", output)
+        self.assertIn("2 drifted (total 4, net -2, max 3)", output)
+        self.assertEqual(self.likes(), [7, 1, 2, 3, 1])
+
+        self.reconcile(full=True)
+        self.assertEqual(self.likes(), [0, 1, 2, 3, 1])
+
+    def test_dry_run(self):
+        """
+        Test that a dry run reports drift without correcting it or moving the checkpoint.
+        """
+        Post.all_objects.filter(pk=self.posts[3].pk).update(likes=1)
+        output = self.reconcile(dry_run=True)
+        self.assertIn("1 drifted (total 2, net +2, max 2), not corrected (dry run)", output)
+        self.assertEqual(self.likes(), [0, 1, 2, 1, 0])
+        self.assertFalse(Checkpoint.objects.exists())
+
+    def test_like_updates_mark_posts(self):
+        """
+        Test that the like endpoints and the like count job record when a counter changed.
+        """
+        client = APIClient()
+        client.force_authenticate(user=self.author)
+        client.post(reverse('like-post', kwargs={'post_id': self.posts[0].pk}))
+        self.assertIsNotNone(Post.all_objects.get(pk=self.posts[0].pk).likes_updated_at)
+        apply_like_delta(post_id=self.posts[1].pk, delta=1)
+        self.assertIsNotNone(Post.all_objects.get(pk=self.posts[1].pk).likes_updated_at)
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import (CheckFollowingStatusView, FeedListView, FollowUserView, LikeView, ListUserFollowsView,
-PostCreateView, PostDeleteView, PostUpdateView, RegisterUserView, RetrieveUserView,
+from .views import (CheckFollowingStatusView, DeleteAccountView, FeedDeltaView, FeedListView, FollowUserView, LikeView, ListUserFollowsView,
+PostBatchView, PostCreateView, PostDeleteView, PostLikersView, PostUpdateView, RegisterUserView, RetrieveUserView,
  UserPostsView)
+from .stream import feed_stream
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -12,14 +13,19 @@ urlpatterns = [
     path('users/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('users/register/', RegisterUserView.as_view(), name='register'),
+    path('users/me/', DeleteAccountView.as_view(), name='delete_account'),
     path('users/<user_identifier>/info/', RetrieveUserView.as_view(), name='user_info'),
     path('users/<str:username>/follow/', FollowUserView.as_view(), name='follow_user'),
     path('users/follows/', ListUserFollowsView.as_view(), name='list_user_follows'),
     path('users/<user_identifier>/following-status/', CheckFollowingStatusView.as_view(), name='check_following_status'),
     path('users/feed/', FeedListView.as_view(), name='feed'),
+    path('users/feed/new/', FeedDeltaView.as_view(), name='feed_delta'),
+    path('users/feed/stream/', feed_stream, name='feed_stream'),
     path('users/<user_identifier>/posts/', UserPostsView.as_view(), name='retrieve_posts'),
     path('posts/', PostCreateView.as_view(), name='create_post'),
+    path('posts/batch/', PostBatchView.as_view(), name='post_batch'),
     path('posts/<int:post_id>/', PostDeleteView.as_view(), name='delete_post'),
     path('posts/<int:post_id>/like/', LikeView.as_view(), name='like-post'),
+    path('posts/<int:post_id>/likes/', PostLikersView.as_view(), name='post_likers'),
     path('posts/<int:post_id>/edit/', PostUpdateView.as_view(), name='update_post'),
 ]
\ No newline at end of file
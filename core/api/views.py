@@ -1,18 +1,71 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.shortcuts import render
 
-from .models import Follow, Like, Post
-from .serializers import UserSerializer, PostSerializer
+from .events import author_channel, publish
+from . import post_cache
+from .jobs import enqueue
+from .loaders import loaders_for
+from .ranking import ranked_ids
+from .models import AccountDeletion, Follow, Like, Post
+from .serializers import FeedPostSerializer, LikerSerializer, UserSerializer, PostSerializer, requested_fields
 from rest_framework import generics, status
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.contrib.auth.models import User
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.decorators import api_view, permission_classes
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.db.models import Count, Q
 from rest_framework.permissions import BasePermission
 from rest_framework.views import APIView
 
+class SparseFieldsViewMixin:
+    """
+    Trims list querysets to the columns selected with ?fields= / ?exclude=.
+    `required_columns` and the ordering of a cursor pagination class are
+    loaded regardless, since the cursor is read from the last row.
+    """
+    required_columns = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        required = list(self.required_columns)
+        if self.pagination_class is not None and issubclass(self.pagination_class, CursorPagination):
+            ordering = self.pagination_class.ordering
+            if isinstance(ordering, str):
+                ordering = (ordering,)
+            required += [field.lstrip('-') for field in ordering]
+        return self.get_serializer_class().sparse_queryset(queryset, self.request, required)
+
+def load_user(request, user_identifier):
+    """
+    Return the active user with the given id, or username when it is not a
+    number, through the request's loaders.
+    """
+    loaders = loaders_for(request)
+    try:
+        user_id = int(user_identifier)
+    except ValueError:
+        user = loaders.users_by_username.load(user_identifier)
+        if user is None:
+            raise NotFound(f"User with username '{user_identifier}' not found")
+        return user
+    user = loaders.users.load(user_id)
+    if user is None:
+        raise NotFound(f"User with ID '{user_id}' not found")
+    return user
+
+def load_post(request, post_id):
+    post = loaders_for(request).posts.load(int(post_id))
+    if post is None:
+        raise Post.DoesNotExist
+    return post
+
 class IsAuthor(BasePermission):
     def has_object_permission(self, request, view, obj):
         return obj.author == request.user
@@ -25,12 +78,16 @@ class PostUpdateView(generics.UpdateAPIView):
     def get_object(self):
         post_id = self.kwargs.get('post_id')
         try:
-            post = Post.objects.get(pk=post_id)
+            post = load_post(self.request, post_id)
         except Post.DoesNotExist:
             raise NotFound("Post not found")
         self.check_object_permissions(self.request, post)
         return post
 
+    def perform_update(self, serializer):
+        post = serializer.save()
+        post_cache.invalidate(post.pk)
+
 class RegisterUserView(generics.CreateAPIView):
 
     serializer_class = UserSerializer
@@ -50,19 +107,20 @@ class RetrieveUserView(APIView):
 
     def get(self, request, *args, **kwargs):
         user_identifier = kwargs.get('user_identifier')
+        users = UserSerializer.sparse_queryset(User.objects.filter(is_active=True), request)
 
         try:
             user_id = int(user_identifier)
             try:
-                user = User.objects.get(pk=user_id)
-                serializer = UserSerializer(user)
+                user = users.get(pk=user_id)
+                serializer = UserSerializer(user, context={'request': request})
                 return Response(serializer.data)
             except User.DoesNotExist:
                 raise NotFound(detail=f"User with ID '{user_id}' not found")
         except ValueError:
             try:
-                user = User.objects.get(username=user_identifier)
-                serializer = UserSerializer(user)
+                user = users.get(username=user_identifier)
+                serializer = UserSerializer(user, context={'request': request})
                 return Response(serializer.data)
             except User.DoesNotExist:
                 raise NotFound(detail=f"User with username '{user_identifier}' not found")
@@ -73,15 +131,18 @@ class PostCreateView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            post = serializer.save(author=self.request.user)
+            if post.image:
+                enqueue('process_post_image', {'post_id': post.pk})
+            publish(author_channel(post.author_id), {'type': 'post', 'post_id': post.pk})
 
 class FollowUserView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, username):
-        try:
-            user_to_follow = User.objects.get(username=username)
-        except User.DoesNotExist:
+        user_to_follow = loaders_for(request).users_by_username.load(username)
+        if user_to_follow is None:
             return Response({"error": "User to follow not found"}, status=status.HTTP_404_NOT_FOUND)
 
         if user_to_follow == request.user:
@@ -98,9 +159,8 @@ class FollowUserView(APIView):
             return Response({"message": f"You are already following {username}"}, status=status.HTTP_200_OK)
 
     def delete(self, request, username):
-        try:
-            user_to_unfollow = User.objects.get(username=username)
-        except User.DoesNotExist:
+        user_to_unfollow = loaders_for(request).users_by_username.load(username)
+        if user_to_unfollow is None:
             return Response({"error": "User to unfollow not found"}, status=status.HTTP_404_NOT_FOUND)
 
         if user_to_unfollow == request.user:
@@ -117,21 +177,7 @@ class CheckFollowingStatusView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request, user_identifier, *args, **kwargs):
-        
-        try:
-            
-            user_id = int(user_identifier)
-            try:
-                target_user = User.objects.get(pk=user_id)
-            except User.DoesNotExist:
-                raise NotFound(f"User with ID '{user_id}' not found")
-        except ValueError:
-            
-            try:
-                target_user = User.objects.get(username=user_identifier)
-            except User.DoesNotExist:
-                raise NotFound(f"User with username '{user_identifier}' not found")
-        
+        target_user = load_user(request, user_identifier)
         
         is_following = Follow.objects.filter(
             follower=request.user,
@@ -146,44 +192,132 @@ class CheckFollowingStatusView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class ListUserFollowsView(generics.ListAPIView):
+class ListUserFollowsView(SparseFieldsViewMixin, generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
-        return User.objects.filter(followers__follower=user)
-
-class FeedListView(generics.ListAPIView):
+        return User.objects.filter(followers__follower=user, is_active=True)
+
+def within_feed_window(queryset):
+    # A constant lower bound on created_at lets Postgres skip older monthly
+    # partitions at plan time when api_post is partitioned.
+    days = settings.POSTS_FEED_WINDOW_DAYS
+    if days is None:
+        return queryset
+    return queryset.filter(created_at__gte=timezone.now() - timedelta(days=days))
+
+
+def liked_by_following(user, post_ids):
+    """
+    Return {post id: number of accounts `user` follows that liked it} for a
+    page of posts, in a single grouped query.
+    """
+    following = Follow.objects.filter(follower=user, following__is_active=True).values('following_id')
+    counts = (
+        Like.objects.filter(post_id__in=post_ids, user_id__in=following)
+        .values('post_id').annotate(n=Count('pk')).values_list('post_id', 'n')
+    )
+    return dict(counts)
+
+
+class FeedListView(SparseFieldsViewMixin, generics.ListAPIView):
+    """
+    Posts of the followed accounts and the user's own, newest first, or with
+    ?mode=ranked in the order computed by api.ranking.
+    """
     permission_classes = [IsAuthenticated]
-    serializer_class = PostSerializer
+    serializer_class = FeedPostSerializer
+    modes = ('latest', 'ranked')
 
     def get_queryset(self):
-        following_users = Follow.objects.filter(follower=self.request.user).values_list('following_id', flat=True)
-        return Post.objects.filter(
+        following_users = Follow.objects.filter(
+            follower=self.request.user, following__is_active=True,
+        ).values_list('following_id', flat=True)
+        return within_feed_window(Post.objects.filter(
             Q(author__in=following_users) | Q(author=self.request.user)
-        ).order_by('-created_at')
+        )).order_by('-created_at')
+
+    def paginate_queryset(self, queryset):
+        mode = self.request.query_params.get('mode', 'latest')
+        if mode not in self.modes:
+            raise ValidationError({'mode': f"Must be one of: {', '.join(self.modes)}."})
+        if mode == 'ranked':
+            # Pages come from the cached ranking, posts deleted since are skipped.
+            ids = super().paginate_queryset(ranked_ids(self.request.user))
+            posts = loaders_for(self.request).posts.load_many(ids)
+            page = [posts[post_id] for post_id in ids if post_id in posts]
+        else:
+            page = super().paginate_queryset(queryset)
+        selected = requested_fields(self.request, FeedPostSerializer.readable_fields())
+        if page and (selected is None or 'liked_by_following' in selected):
+            self.liked_by_following = liked_by_following(self.request.user, [post.pk for post in page])
+        return page
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['liked_by_following'] = getattr(self, 'liked_by_following', {})
+        return context
     
-class UserPostsView(generics.ListAPIView):
-    serializer_class = PostSerializer
+class FeedDeltaView(SparseFieldsViewMixin, generics.GenericAPIView):
+    """
+    Posts added to the feed after ?since_id= (preferred) or ?since= (ISO 8601
+    timestamp). Answers 204 when there is nothing new, otherwise the number of
+    new posts, capped at `max_count`, and the newest page of them unless
+    ?count_only=true.
+    """
     permission_classes = [IsAuthenticated]
+    serializer_class = PostSerializer
+    max_count = 1000
 
-    def get_queryset(self):
-        user_identifier = self.kwargs.get('user_identifier')
-
-        try:
-            user_id = int(user_identifier)
+    def get(self, request):
+        since_id = request.query_params.get('since_id')
+        since = request.query_params.get('since')
+        if since_id is not None:
             try:
-                user = User.objects.get(pk=user_id)
-                return Post.objects.filter(author=user).order_by('-created_at')
-            except User.DoesNotExist:
-                raise NotFound(f"User with ID '{user_id}' not found")
-        except ValueError:
+                new_posts = {'id__gt': int(since_id)}
+            except ValueError:
+                raise ValidationError({'since_id': "Must be an integer."})
+        elif since is not None:
             try:
-                user = User.objects.get(username=user_identifier)
-                return Post.objects.filter(author=user).order_by('-created_at')
-            except User.DoesNotExist:
-                raise NotFound(f"User with username '{user_identifier}' not found")
+                since = parse_datetime(since)
+            except ValueError:
+                # Well formed but out of range, e.g. month 13.
+                since = None
+            if since is None:
+                raise ValidationError({'since': "Must be an ISO 8601 timestamp."})
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            new_posts = {'created_at__gt': since}
+        else:
+            raise ValidationError({'since_id': "Either since_id or since is required."})
+
+        # Only reads post_visible_author_id_idx: inactive authors are excluded
+        # through the follow list rather than a join on auth_user.
+        authors = [request.user.pk, *Follow.objects.filter(
+            follower=request.user, following__is_active=True,
+        ).values_list('following_id', flat=True)]
+        count = Post.all_objects.filter(
+            author__in=authors, deleted_at__isnull=True, **new_posts,
+        ).values('id')[:self.max_count].count()
+        if not count:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if request.query_params.get('count_only') in ('true', '1'):
+            return Response({'count': count})
+
+        posts = self.filter_queryset(
+            Post.objects.filter(author__in=authors, **new_posts).order_by('-created_at')
+        )[:settings.REST_FRAMEWORK['PAGE_SIZE']]
+        return Response({'count': count, 'results': self.get_serializer(posts, many=True).data})
+
+class UserPostsView(SparseFieldsViewMixin, generics.ListAPIView):
+    serializer_class = PostSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = load_user(self.request, self.kwargs.get('user_identifier'))
+        return within_feed_window(Post.objects.filter(author=user)).order_by('-created_at')
 
 
 class PostDeleteView(generics.DestroyAPIView):
@@ -194,42 +328,134 @@ class PostDeleteView(generics.DestroyAPIView):
     def get_object(self):
         post_id = self.kwargs.get('post_id')
         try:
-            post = Post.objects.get(pk=post_id)
+            post = load_post(self.request, post_id)
         except Post.DoesNotExist:
             raise NotFound("Post not found")
         self.check_object_permissions(self.request, post)
         return post
 
+    def perform_destroy(self, instance):
+        # The post disappears from every read path right away, its likes and
+        # image are removed later in small batches by `manage.py purge_deleted`.
+        instance.deleted_at = timezone.now()
+        instance.save(update_fields=['deleted_at'])
+        post_cache.invalidate(instance.pk)
+
+class DeleteAccountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def delete(self, request):
+        user = request.user
+        with transaction.atomic():
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+            AccountDeletion.objects.get_or_create(user=user)
+            enqueue('invalidate_author_posts', {'author_id': user.pk})
+        post_cache.hide_author(user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class LikersPagination(CursorPagination):
+    ordering = '-created_at'
+
+
+class PostLikersView(SparseFieldsViewMixin, generics.ListAPIView):
+    """
+    Accounts that liked a post, most recent first. Keyset pagination over
+    like_post_created_idx keeps deep pages as cheap as the first one.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = LikerSerializer
+    pagination_class = LikersPagination
+
+    def get_queryset(self):
+        if loaders_for(self.request).posts.load(self.kwargs['post_id']) is None:
+            raise NotFound("Post not found")
+        return Like.objects.filter(post_id=self.kwargs['post_id'], user__is_active=True)
+
+class PostBatchView(APIView):
+    """
+    Posts for up to `max_ids` comma separated ?ids=, in the order given.
+    Ids of missing or deleted posts are listed under "missing".
+    """
+    permission_classes = [IsAuthenticated]
+    max_ids = 100
+
+    def get(self, request):
+        try:
+            ids = [int(post_id) for post_id in request.query_params.get('ids', '').split(',') if post_id]
+        except ValueError:
+            raise ValidationError({'ids': "Must be a comma separated list of integers."})
+        if not ids:
+            raise ValidationError({'ids': "This parameter is required."})
+        if len(ids) > self.max_ids:
+            raise ValidationError({'ids': f"At most {self.max_ids} ids are allowed."})
+
+        posts = loaders_for(request).posts.load_many(ids)
+        found = [posts[post_id] for post_id in dict.fromkeys(ids) if post_id in posts]
+        return Response({
+            'results': PostSerializer(found, many=True, context={'request': request}).data,
+            'missing': [post_id for post_id in dict.fromkeys(ids) if post_id not in posts],
+        })
+
+def publish_likes(post, likes):
+    publish(author_channel(post.author_id), {'type': 'likes', 'data': {'post_id': post.pk, 'likes': likes}})
+
 class LikeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, post_id):
         try:
-            post = Post.objects.get(id=post_id)
+            post = load_post(request, post_id)
         except Post.DoesNotExist:
             return Response({"error": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        if settings.JOB_QUEUE['DEFER_LIKE_COUNTS']:
+            with transaction.atomic():
+                like, created = Like.objects.get_or_create(user=request.user, post=post)
+                if created:
+                    enqueue('apply_like_delta', {'post_id': post.pk, 'delta': 1})
+                    publish_likes(post, post.likes + 1)
+            if created:
+                return Response({"message": "Post liked", "likes": post.likes + 1}, status=status.HTTP_201_CREATED)
+            return Response({"message": "Already liked"}, status=status.HTTP_200_OK)
+
         like, created = Like.objects.get_or_create(user=request.user, post=post)
         if created:
             post.likes = models.F('likes') + 1
-            post.save(update_fields=['likes'])
+            post.likes_updated_at = timezone.now()
+            post.save(update_fields=['likes', 'likes_updated_at'])
             post.refresh_from_db(fields=['likes'])
+            post_cache.invalidate(post.pk)
+            publish_likes(post, post.likes)
             return Response({"message": "Post liked", "likes": post.likes}, status=status.HTTP_201_CREATED)
         else:
             return Response({"message": "Already liked"}, status=status.HTTP_200_OK)
 
     def delete(self, request, post_id):
         try:
-            post = Post.objects.get(id=post_id)
+            post = load_post(request, post_id)
         except Post.DoesNotExist:
             return Response({"error": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        if settings.JOB_QUEUE['DEFER_LIKE_COUNTS']:
+            with transaction.atomic():
+                deleted, _ = Like.objects.filter(user=request.user, post=post).delete()
+                if deleted:
+                    enqueue('apply_like_delta', {'post_id': post.pk, 'delta': -deleted})
+                    publish_likes(post, post.likes - deleted)
+            if deleted:
+                return Response({"message": "Post unliked", "likes": post.likes - deleted}, status=status.HTTP_200_OK)
+            return Response({"error": "You haven't liked this post"}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             like = Like.objects.get(user=request.user, post=post)
             like.delete()
             post.likes = models.F('likes') - 1
-            post.save(update_fields=['likes'])
+            post.likes_updated_at = timezone.now()
+            post.save(update_fields=['likes', 'likes_updated_at'])
             post.refresh_from_db(fields=['likes'])
+            post_cache.invalidate(post.pk)
+            publish_likes(post, post.likes)
             return Response({"message": "Post unliked", "likes": post.likes}, status=status.HTTP_200_OK)
         except Like.DoesNotExist:
             return Response({"error": "You haven't liked this post"}, status=status.HTTP_400_BAD_REQUEST)
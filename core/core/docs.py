@@ -0,0 +1,72 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse
+
+# drf_yasg and its inspectors are only imported the first time the docs are
+# requested, so API workers that never serve them skip the import entirely.
+
+
+def get_openapi_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="twitthon",
+        default_version='v1',
+        description="Twitter clone made with django",
+        contact=openapi.Contact(email="brunogois902@gmail.com"),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_schema_view():
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    return get_schema_view(
+        get_openapi_info(),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+
+
+@lru_cache(maxsize=None)
+def _swagger_ui_view():
+    return get_schema_view().with_ui('swagger', cache_timeout=0)
+
+
+@lru_cache(maxsize=None)
+def _schema_json_view():
+    return get_schema_view().without_ui(cache_timeout=0)
+
+
+_schema_files = {}
+
+
+def _read_schema_file(path):
+    # Only successful reads are kept, so a file built after startup is
+    # picked up by the next request.
+    if path not in _schema_files:
+        try:
+            with open(path, 'rb') as fp:
+                _schema_files[path] = fp.read()
+        except FileNotFoundError:
+            return None
+    return _schema_files[path]
+
+
+def swagger_ui(request, *args, **kwargs):
+    return _swagger_ui_view()(request, *args, **kwargs)
+
+
+def openapi_schema(request):
+    """
+    Serve the schema written by `manage.py build_openapi_schema`, falling back
+    to generating it on the fly when the file has not been built.
+    """
+    content = _read_schema_file(settings.OPENAPI_SCHEMA_FILE)
+    if content is None:
+        return _schema_json_view()(request, format='.json')
+    response = HttpResponse(content, content_type='application/json')
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
@@ -52,8 +52,20 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'api.renderers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    'EXCEPTION_HANDLER': 'api.exceptions.exception_handler',
 }
 
 SIMPLE_JWT = {
@@ -61,6 +73,18 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'api.cache_backends.InstrumentedRedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    } if os.getenv('REDIS_URL') else {
+        'BACKEND': 'api.cache_backends.InstrumentedLocMemCache',
+    }
+}
+
+# Lifetime of the per-post entries in api.post_cache, in seconds.
+POST_CACHE_TIMEOUT = int(os.getenv('POST_CACHE_TIMEOUT', '300'))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -72,7 +96,30 @@ DATABASES = {
     }
 }
 
+# Read replicas, e.g. POSTGRES_REPLICA_HOSTS=replica1:5432,replica2:5432.
+# They share the primary's credentials and mirror it in tests. After a user
+# writes, their reads stay on the primary for REPLICA_STICKY_SECONDS; use a
+# shared cache (REDIS_URL) so this holds across worker processes.
+DATABASE_REPLICAS = []
+for index, address in enumerate(filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(','))):
+    host, _, port = address.strip().partition(':')
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ProfilingMiddleware',
+    'api.middleware.ReplicaPinningMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,6 +130,77 @@ MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
 ]
 
+# Real-time feed stream (api.stream). InProcessBroker only reaches clients
+# connected to the same process; use api.events.PostgresBroker when running
+# several ASGI workers.
+EVENTS = {
+    'BROKER': os.getenv('EVENTS_BROKER', 'api.events.InProcessBroker'),
+    'QUEUE_SIZE': int(os.getenv('EVENTS_QUEUE_SIZE', '100')),
+    'HEARTBEAT_SECONDS': float(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15')),
+}
+
+# Response compression, see api.middleware.CompressionMiddleware. Brotli is
+# used when the `brotli` package is installed and the client accepts it.
+COMPRESSION = {
+    'ENABLED': os.getenv('COMPRESSION_ENABLED', 'True') == 'True',
+    'MIN_SIZE': int(os.getenv('COMPRESSION_MIN_SIZE', '1024')),
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 4,
+    'CONTENT_TYPES': ('application/json', 'application/msgpack'),
+}
+
+# Prometheus metrics served at /metrics, see api.metrics.
+# With several worker processes point MULTIPROCESS_DIR at a directory shared
+# by all of them (and cleared on deploy) so /metrics reports the sum.
+METRICS = {
+    'ENABLED': os.getenv('METRICS_ENABLED', 'True') == 'True',
+    'TOKEN': os.getenv('METRICS_TOKEN'),
+    'MULTIPROCESS_DIR': os.getenv('METRICS_MULTIPROCESS_DIR'),
+    'FLUSH_INTERVAL': 1.0,
+}
+
+# Optional age limit, in days, for posts listed by the feed and profile
+# endpoints. With api_post partitioned by month (manage.py partition_posts)
+# this keeps those queries on the recent partitions.
+POSTS_FEED_WINDOW_DAYS = int(os.environ['POSTS_FEED_WINDOW_DAYS']) if os.getenv('POSTS_FEED_WINDOW_DAYS') else None
+
+# Ranked feed (?mode=ranked), see api.ranking. Up to CANDIDATES posts from
+# the last MAX_AGE_DAYS are scored and their order is cached per user for
+# CACHE_TIMEOUT seconds.
+FEED_RANKING = {
+    'CANDIDATES': int(os.getenv('FEED_RANKING_CANDIDATES', '500')),
+    'CACHE_TIMEOUT': int(os.getenv('FEED_RANKING_CACHE_TIMEOUT', '60')),
+    'MAX_AGE_DAYS': 7,
+    'RECENCY_HALF_LIFE_HOURS': 12,
+    'AFFINITY_DAYS': 30,
+    'WEIGHTS': {'RECENCY': 1.0, 'VELOCITY': 1.0, 'AFFINITY': 0.5},
+}
+
+# Background jobs, see api.jobs and `manage.py run_jobs`.
+# EAGER runs handlers inline instead of enqueueing them. With
+# DEFER_LIKE_COUNTS, like/unlike only insert or delete the Like row and the
+# counter update is left to a worker.
+JOB_QUEUE = {
+    'EAGER': os.getenv('JOB_QUEUE_EAGER', 'False') == 'True',
+    'DEFER_LIKE_COUNTS': os.getenv('JOB_QUEUE_DEFER_LIKE_COUNTS', 'False') == 'True',
+    'RETRY_BASE_SECONDS': 5,
+    'RETRY_MAX_SECONDS': 3600,
+    'LOCK_TIMEOUT_SECONDS': 300,
+    'MAX_IMAGE_SIZE': 2048,
+}
+
+# Sampled request profiling, see api.middleware.ProfilingMiddleware.
+# Requests sending the HEADER with HEADER_TOKEN as value are always profiled
+# (any value is accepted in DEBUG when no token is configured).
+PROFILING = {
+    'ENABLED': os.getenv('PROFILING_ENABLED', 'False') == 'True',
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', '0')),
+    'HEADER': 'X-Profile',
+    'HEADER_TOKEN': os.getenv('PROFILING_TOKEN'),
+    'DIRECTORY': os.getenv('PROFILING_DIRECTORY', os.path.join(BASE_DIR, 'profiles')),
+    'MAX_FILES': int(os.getenv('PROFILING_MAX_FILES', '200')),
+}
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -102,6 +220,24 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# Password hashes are computed in a pool of PROCESSES processes (0 computes
+# them in the request thread); once MAX_PENDING hashes are queued or running
+# in a worker, logins and registrations are answered with 503 right away.
+# Changing ITERATIONS rehashes passwords as their owners log in.
+PASSWORD_HASHING = {
+    'PROCESSES': int(os.getenv('PASSWORD_HASHING_PROCESSES', '2')),
+    'MAX_PENDING': int(os.getenv('PASSWORD_HASHING_MAX_PENDING', '16')),
+    'ITERATIONS': int(os.environ['PASSWORD_HASHING_ITERATIONS']) if os.getenv('PASSWORD_HASHING_ITERATIONS') else None,
+}
+
+PASSWORD_HASHERS = [
+    'api.hashers.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -146,5 +282,12 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Built by `manage.py build_openapi_schema` and served at /swagger.json
+OPENAPI_SCHEMA_FILE = os.path.join(BASE_DIR, 'openapi.json')
+
+SWAGGER_SETTINGS = {
+    'SPEC_URL': 'openapi-schema',
+}
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
@@ -1,28 +1,17 @@
 
 from django.contrib import admin
 from django.urls import path, include
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from rest_framework import permissions
 from django.conf.urls.static import static
 from django.conf import settings
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="twitthon",
-        default_version='v1',
-        description="Twitter clone made with django",
-        contact=openapi.Contact(email="brunogois902@gmail.com"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from api.metrics import metrics_view
+from .docs import openapi_schema, swagger_ui
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('swagger/', schema_view.with_ui('swagger',
-        cache_timeout=0), name='schema-swagger-ui'),
+    path('swagger/', swagger_ui, name='schema-swagger-ui'),
+    path('swagger.json', openapi_schema, name='openapi-schema'),
     path('api/v1/', include('api.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG: